@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Synthetic corpus generator for the Raptors1.0 benchmarks
+"""
+import argparse
+import json
+import os
+import random
+
+CHUNK = 1 << 20
+WORDS = ["alpha", "beta", "gamma", "delta", "request", "served", "cache", "token", "user", "admin", "timeout", "retry"]
+LEVELS = ["INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR"]
+
+
+def write_until(path, size, make_block):
+    """Append blocks from make_block(i) until the file reaches size bytes."""
+    written, i = 0, 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        while written < size:
+            block = make_block(i)
+            f.write(block)
+            written += len(block)
+            i += 1
+    return path
+
+
+def log_block(i, rng):
+    lines = []
+    for n in range(2000):
+        seq = i * 2000 + n
+        ts = f"2025-01-{1 + seq // 86400 % 28:02d} {seq // 3600 % 24:02d}:{seq // 60 % 60:02d}:{seq % 60:02d}"
+        lines.append(f"{ts} {rng.choice(LEVELS)} worker-{seq % 16} {' '.join(rng.choices(WORDS, k=6))} from 10.0.{seq % 256}.{seq % 200} http://svc.example.com/api/{seq}\n")
+    return "".join(lines)
+
+
+def csv_block(i, rng, columns, delimiter):
+    rows = []
+    for n in range(2000):
+        seq = i * 2000 + n
+        cells = [str(seq), f"user{rng.randint(0, 100000)}", f"{rng.random() * 1000:.3f}", rng.choice(["true", "false", ""]), f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"]
+        cells += [rng.choice(WORDS) for _ in range(columns - len(cells))]
+        rows.append(delimiter.join(cells[:columns]) + "\n")
+    return "".join(rows)
+
+
+def code_block(i, rng):
+    parts = []
+    for n in range(200):
+        name = f"{rng.choice(WORDS)}_{i}_{n}"
+        parts.append(f"# helper {name}\nimport os\n\nclass {name.title().replace('_', '')}:\n    def run(self, value):\n        token = os.environ.get('API_TOKEN')\n        return [value * {n}, token]\n\n\ndef {name}(x):\n    return x + {n}  # see https://docs.example.com/{name}\n\n")
+    return "".join(parts)
+
+
+def generate_json(path, size, rng):
+    """Write one large JSON document: an object holding an array of records."""
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"meta": {"generator": "raptors-bench", "version": 1}, "records": [')
+        first = True
+        while written < size:
+            block = ",".join(json.dumps({"id": rng.randint(0, 10 ** 9), "user": {"name": rng.choice(WORDS), "email": f"{rng.choice(WORDS)}@example.com"}, "tags": rng.choices(WORDS, k=3), "score": rng.random()}) for _ in range(500))
+            f.write(block if first else "," + block)
+            written += len(block) + 1
+            first = False
+        f.write("]}\n")
+    return path
+
+
+def generate_ndjson(path, size, rng):
+    return write_until(path, size, lambda i: "".join(json.dumps({"id": i * 500 + n, "event": rng.choice(WORDS), "level": rng.choice(LEVELS), "latency_ms": rng.randint(1, 900)}) + "\n" for n in range(500)))
+
+
+def generate_binary(path, size, rng):
+    with open(path, "wb") as f:
+        for offset in range(0, size, CHUNK):
+            block = min(CHUNK, size - offset)
+            f.write(os.urandom(block) if offset // CHUNK % 2 else bytes(block // 2) + b"firmware-string-" * (block // 32))
+    return path
+
+
+CORPUS_FILES = {"log": "app.log", "csv": "wide.csv", "tsv": "wide.tsv", "json": "dump.json", "ndjson": "events.ndjson", "python": "module.py", "binary": "firmware.bin"}
+
+
+def corpus_paths(out_dir):
+    """Return {kind: path} for the corpus files under out_dir, whether or not they exist."""
+    return {kind: os.path.join(out_dir, name) for kind, name in CORPUS_FILES.items()}
+
+
+def generate_corpus(out_dir, size_mb=20, csv_columns=40, seed=1234, kinds=None):
+    """Create the synthetic files under out_dir (only those in kinds, when given) and return {kind: path}."""
+    size = int(size_mb * CHUNK)
+    os.makedirs(out_dir, exist_ok=True)
+    header = lambda delimiter: delimiter.join(f"col{c}" for c in range(csv_columns)) + "\n"
+    generators = {
+        "log": lambda path, rng: write_until(path, size, lambda i: log_block(i, rng)),
+        "csv": lambda path, rng: write_until(path, size, lambda i: (header(",") if i == 0 else "") + csv_block(i, rng, csv_columns, ",")),
+        "tsv": lambda path, rng: write_until(path, size, lambda i: (header("\t") if i == 0 else "") + csv_block(i, rng, csv_columns, "\t")),
+        "json": lambda path, rng: generate_json(path, size, rng),
+        "ndjson": lambda path, rng: generate_ndjson(path, size, rng),
+        "python": lambda path, rng: write_until(path, size, lambda i: code_block(i, rng)),
+        "binary": lambda path, rng: generate_binary(path, size, rng),
+    }
+    paths = corpus_paths(out_dir)
+    for kind, path in paths.items():
+        # One generator per kind, so a file's content does not depend on which others were generated with it
+        if kinds is None or kind in kinds:
+            generators[kind](path, random.Random(f"{seed}-{kind}"))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic corpus for the Raptors1.0 benchmarks")
+    parser.add_argument("out_dir", help="Directory to write the corpus into")
+    parser.add_argument("--size-mb", type=float, default=20, help="Approximate size of each file in MB (default: 20)")
+    parser.add_argument("--csv-columns", type=int, default=40, help="Columns in the CSV/TSV files (default: 40)")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed (default: 1234)")
+    args = parser.parse_args()
+    for kind, path in generate_corpus(args.out_dir, args.size_mb, args.csv_columns, args.seed).items():
+        print(f"{kind:8} {os.path.getsize(path) / CHUNK:8.1f}MB  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the Raptors1.0 preview paths, analysis engine and bundled plugins
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import preview  # noqa: E402
+from corpus import CORPUS_FILES, corpus_paths, generate_corpus  # noqa: E402
+
+PLUGINS = ["stats_plugin.py", "hash_plugin.py", "network_plugin.py"]
+
+
+def quiet(fn):
+    """Run fn with stdout discarded so terminal rendering does not skew timings."""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        return fn()
+
+
+def measure(fn, repeat, track_memory):
+    """Return (best wall seconds, best CPU seconds, peak traced MB or None)."""
+    wall, cpu = [], []
+    for _ in range(repeat):
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        quiet(fn)
+        wall.append(time.perf_counter() - start_wall)
+        cpu.append(time.process_time() - start_cpu)
+    peak = None
+    if track_memory:
+        tracemalloc.start()
+        quiet(fn)
+        peak = tracemalloc.get_traced_memory()[1] / (1 << 20)
+        tracemalloc.stop()
+    return min(wall), min(cpu), peak
+
+
+def make_previewer():
+    previewer = preview.FilePreview()
+    previewer.max_lines, previewer.max_width = 50, 120
+    return previewer
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def cases(corpus):
+    """Yield (name, kind, path, fn) for every benchmarked code path."""
+    previewer = make_previewer()
+    all_paths = list(corpus.values())
+    yield "detect_type", "all", None, lambda: [previewer.detect_type(path) for path in all_paths * 100]
+    for kind, path in corpus.items():
+        file_type = previewer.detect_type(path)
+        yield "preview_file", kind, path, lambda path=path: make_previewer().preview_file(path)
+        if kind != "binary":
+            yield "analyze_file_comprehensive", kind, path, lambda path=path, file_type=file_type: previewer.analyze_file_comprehensive(path, None, file_type)
+        if kind in ("log", "python"):
+            yield "preview_stream", kind, path, lambda path=path, file_type=file_type: previewer.preview_stream(path, file_type, os.path.getsize(path))
+        if kind == "log":
+            yield "preview_log", kind, path, lambda path=path: previewer.preview_log(read_text(path))
+        if kind == "python":
+            yield "preview_code", kind, path, lambda path=path: previewer.preview_code(read_text(path), "python")
+        if kind in ("csv", "tsv"):
+            yield "preview_csv", kind, path, lambda path=path, file_type=file_type: previewer.preview_csv(path, file_type)
+        if kind == "json":
+            yield "preview_json", kind, path, lambda path=path: previewer.preview_json(read_text(path))
+        if kind == "ndjson":
+            yield "preview_ndjson", kind, path, lambda path=path: previewer.preview_ndjson(read_text(path))
+        if kind in ("json", "ndjson"):
+            yield "preview_text", kind, path, lambda path=path: previewer.preview_text(read_text(path))
+        if kind == "binary":
+            yield "preview_binary", kind, path, lambda path=path: previewer.preview_binary(path)
+            yield "preview_binary+entropy+strings", kind, path, lambda path=path: binary_scan(path)
+    for plugin in PLUGINS:
+        manager = preview.PluginManager()
+        if not quiet(lambda: manager.load_plugin(str(ROOT / "plugins" / plugin))):
+            continue
+        for kind in ("log", "python"):
+            path = corpus[kind]
+            file_type = previewer.detect_type(path)
+            yield f"plugin:{plugin}", kind, path, lambda manager=manager, path=path, file_type=file_type: run_plugins(manager, path, file_type)
+
+
+def run_plugins(manager, path, file_type):
+    """Run the plugins on a fresh FileContext, so the views they touch (text, analysis, digests) are paid for on every run."""
+    ctx = preview.FileContext(path, file_type, make_previewer())
+    try:
+        manager.process_file(ctx)
+    finally:
+        ctx.close()
+
+
+def binary_scan(path):
+    previewer = make_previewer()
+    previewer.show_entropy, previewer.strings_min = True, 8
+    previewer.preview_binary(path)
+
+
+def run(corpus, repeat, track_memory):
+    sizes = {kind: os.path.getsize(path) for kind, path in corpus.items()}
+    lines = {}
+    for kind, path in corpus.items():
+        with open(path, "rb") as f:
+            lines[kind] = preview.count_lines(f)
+    results = []
+    for name, kind, path, fn in cases(corpus):
+        wall, cpu, peak = measure(fn, repeat, track_memory)
+        size = 0 if path is None else sizes[kind]
+        count = len(corpus) * 100 if path is None else lines[kind]
+        results.append({
+            "name": name, "kind": kind, "file": path, "bytes": size, "seconds": round(wall, 6), "cpu_seconds": round(cpu, 6),
+            "mb_per_s": round(size / (1 << 20) / wall, 2) if wall and path is not None else None,
+            ("files_per_s" if path is None else "lines_per_s"): round(count / wall) if wall else None,
+            "peak_mb": round(peak, 2) if peak is not None else None,
+        })
+        print(f"{name:32} {kind:7} {wall * 1000:10.1f}ms {results[-1]['mb_per_s'] or 0:10.1f}MB/s {('-' if peak is None else f'{peak:.1f}MB'):>10}")
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    """Print cases that got slower than the baseline by more than tolerance; return their count."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["name"], r["kind"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    for result in results:
+        old = baseline.get((result["name"], result["kind"]))
+        if not old or not old["seconds"]:
+            continue
+        change = result["seconds"] / old["seconds"] - 1
+        if change > tolerance:
+            regressions += 1
+            print(f"REGRESSION {result['name']} [{result['kind']}]: {old['seconds'] * 1000:.1f}ms -> {result['seconds'] * 1000:.1f}ms ({change:+.0%})")
+    print(f"\n{regressions} regression(s) beyond {tolerance:.0%} against {baseline_path}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Raptors1.0 preview paths on a synthetic corpus")
+    parser.add_argument("--corpus", help="Corpus directory to reuse; missing files are generated, other files are never touched")
+    parser.add_argument("--size-mb", type=float, default=20, help="Size of each generated file in MB (default: 20)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case, best is kept (default: 3)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory run")
+    parser.add_argument("--json", help="Write machine-readable results to this file")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown before a case counts as a regression (default: 0.15)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="raptors-bench-") as scratch:
+        corpus_dir = args.corpus or scratch
+        corpus = corpus_paths(corpus_dir)
+        missing = [kind for kind, path in corpus.items() if not os.path.exists(path)]
+        if missing:
+            # Only ever create missing corpus files, and never inside a directory that holds something else
+            foreign = os.path.isdir(corpus_dir) and sorted(set(os.listdir(corpus_dir)) - set(CORPUS_FILES.values()))
+            if foreign:
+                parser.error(f"{corpus_dir} is not a corpus directory (found {', '.join(foreign[:3])}); pass an empty or new directory")
+            print(f"Generating {args.size_mb:g}MB corpus files ({', '.join(missing)}) in {corpus_dir} ...")
+            generate_corpus(corpus_dir, args.size_mb, kinds=missing)
+        else:
+            print(f"Using existing corpus in {corpus_dir} (--size-mb ignored)")
+        results = run(corpus, max(args.repeat, 1), not args.no_memory)
+
+    report = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(), "platform": platform.platform(), "size_mb": args.size_mb, "repeat": args.repeat},
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,22 @@
 # File Hash Plugin
-import hashlib
+import os
+
+ALGORITHMS = tuple(name.strip() for name in os.environ.get('RAPTORS_HASHES', 'md5,sha1,sha256').split(',') if name.strip())
 
 def register(plugin_manager):
-    plugin_manager.register_processor(show_hashes)
+    plugin_manager.register_processor(show_hashes, context=True)
 
-def show_hashes(filepath, content, file_type):
+def show_hashes(ctx):
     try:
-        with open(filepath, 'rb') as f:
-            data = f.read()
-        
-        md5 = hashlib.md5(data).hexdigest()[:16]
-        sha1 = hashlib.sha1(data).hexdigest()[:16]
-        sha256 = hashlib.sha256(data).hexdigest()[:16]
+        hashes = dict(ctx.cache.get(ctx.filepath).get('hashes') or {}) if ctx.cache else {}
+        missing = tuple(name for name in ALGORITHMS if name not in hashes)
+        if missing:
+            # One pass over the mapped file feeds every algorithm; hashlib releases the GIL per chunk
+            hashes.update(ctx.digests(missing))
+            if ctx.cache: ctx.cache.update(ctx.filepath, hashes=hashes)
         
-        print(f"\n\033[95m🔐 File Hashes (truncated)\033[0m")
-        print(f"MD5: {md5}... | SHA1: {sha1}... | SHA256: {sha256}...")
+        print(f"\n\033[95m🔐 File Hashes\033[0m")
+        for name in ALGORITHMS:
+            print(f"{name.upper():<8} {hashes[name]}")
     except Exception as e:
-        print(f"\033[91m❌ Hash error: {e}\033[0m")
\ No newline at end of file
+        print(f"\033[91m❌ Hash error: {e}\033[0m")
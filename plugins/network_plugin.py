@@ -3,12 +3,16 @@ import re
 
 def register(plugin_manager):
     plugin_manager.register_handler('config', analyze_network_config)
-    plugin_manager.register_processor(find_network_refs)
+    plugin_manager.register_processor(find_network_refs, context=True)
 
 def analyze_network_config(filepath, previewer):
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        # Handlers can be called without a file context (e.g. directly from another tool); read the file then
+        if previewer.context is not None:
+            content = previewer.context.text
+        else:
+            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
         
         ips = re.findall(r'\b(?:\d{1,3}\.){3}\d{1,3}\b', content)
         ports = re.findall(r':\d{2,5}\b', content)
@@ -23,11 +27,12 @@ def analyze_network_config(filepath, previewer):
     except Exception as e:
         print(f"\033[91m❌ Network analysis error: {e}\033[0m")
 
-def find_network_refs(filepath, content, file_type):
-    urls = re.findall(r'https?://[^\s<>"\']+', content)
+def find_network_refs(ctx):
+    analysis = ctx.analysis
+    urls, total = analysis.urls, analysis.patterns.get('urls', 0)
     if urls:
-        print(f"\n\033[93m🔗 URLs Found ({len(urls)})\033[0m")
+        print(f"\n\033[93m🔗 URLs Found ({total})\033[0m")
         for url in urls[:3]:
             print(f"  {url}")
-        if len(urls) > 3:
-            print(f"  ... and {len(urls)-3} more")
\ No newline at end of file
+        if total > 3:
+            print(f"  ... and {total-3} more")
\ No newline at end of file
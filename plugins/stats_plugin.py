@@ -1,24 +1,18 @@
 # File Statistics Plugin
-import os,re
-from pathlib import Path
 
 def register(plugin_manager):
-    plugin_manager.register_processor(show_stats)
+    plugin_manager.register_processor(show_stats, context=True)
 
-def show_stats(filepath, content, file_type):
-    if file_type == 'binary': return
-    path = Path(filepath)
+def show_stats(ctx):
+    if ctx.file_type == 'binary': return
+    analysis = ctx.analysis
     
-    # Basic stats
-    lines = content.count('\n') + 1 if content else 0
-    words = len(content.split()) if content else 0
-    chars = len(content)
+    # Basic stats (shared single-pass analysis from the file context)
+    lines, words, chars = analysis.stats['lines'], analysis.stats['words'], analysis.stats['chars']
     
     # Code-specific stats
-    if file_type in ['python', 'javascript', 'shell']:
-        functions = len(re.findall(r'^\s*(def |function |function\s)', content, re.MULTILINE))
-        classes = len(re.findall(r'^\s*class\s', content, re.MULTILINE))
-        comments = len(re.findall(r'^\s*#', content, re.MULTILINE))
+    if ctx.file_type in ['python', 'javascript', 'shell']:
+        functions, classes, comments = (analysis.code_stats[k] for k in ('functions', 'classes', 'comments'))
         
         print(f"\n\033[96m📊 Code Statistics\033[0m")
         print(f"Functions: {functions} | Classes: {classes} | Comments: {comments}")
@@ -28,5 +22,4 @@ def show_stats(filepath, content, file_type):
     print(f"Lines: {lines:,} | Words: {words:,} | Characters: {chars:,}")
     
     # File system stats
-    stat = path.stat()
-    print(f"Permissions: {oct(stat.st_mode)[-3:]} | Inode: {stat.st_ino}")
\ No newline at end of file
+    print(f"Permissions: {oct(ctx.stat.st_mode)[-3:]} | Inode: {ctx.stat.st_ino}")
\ No newline at end of file
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Thin client for `preview.py --serve`: forwards its arguments to the warm daemon and streams back the rendered output."""
+import json
+import os
+import socket
+import sys
+import tempfile
+
+FORWARDED_ENV = ('RAPTORS_CACHE',)
+FOLLOW_FLAGS = {'-f', '--follow'}
+
+
+def default_socket():
+    if os.environ.get('RAPTORS_SOCKET'):
+        return os.environ['RAPTORS_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'raptors.sock')
+    return os.path.join(tempfile.gettempdir(), f"raptors-{os.getuid() if hasattr(os, 'getuid') else 'user'}", 'raptors.sock')
+
+
+def connect(path):
+    # Only talk to a daemon started by this user; another user's socket would see our argv and cwd and control our output
+    if os.stat(path).st_uid != os.getuid():
+        print(f"⚠️  Ignoring {path}: owned by another user", file=sys.stderr)
+        raise PermissionError(path)
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+    except OSError:
+        conn.close()
+        raise
+    return conn
+
+
+def preview_locally():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import preview
+    return preview.main()
+
+
+def main():
+    # The daemon does not serve --follow, which would outlive the connection
+    if FOLLOW_FLAGS & set(sys.argv[1:]):
+        return preview_locally()
+    try:
+        conn = connect(default_socket())
+    except (OSError, AttributeError):
+        # No daemon running (or no Unix sockets): preview in-process instead
+        return preview_locally()
+    with conn:
+        request = {'argv': sys.argv[1:], 'cwd': os.getcwd(), 'env': {name: os.environ[name] for name in FORWARDED_ENV if name in os.environ}}
+        conn.sendall(json.dumps(request).encode() + b'\n')
+        out, pending = sys.stdout.buffer, b''
+        # The reply is the rendered output followed by a "\0<exit code>\n" trailer
+        for chunk in iter(lambda: conn.recv(1 << 16), b''):
+            pending += chunk
+            out.write(pending[:-16])
+            out.flush()
+            pending = pending[-16:]
+    body, separator, code = pending.rpartition(b'\0')
+    out.write(body if separator else pending)
+    out.flush()
+    sys.exit(int(code) if separator and code.strip().isdigit() else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,688 @@
-import os,sys,json,csv,argparse,re,importlib.util
+import os,sys,json,csv,argparse,re,importlib,importlib.util,itertools,hashlib,time,mmap,math,random,bisect,io,threading,codecs
+from array import array
+from functools import partial,lru_cache
+from collections import Counter,namedtuple,defaultdict,deque
+from contextlib import contextmanager,nullcontext
 from pathlib import Path
 from datetime import datetime
-try:
-    from openai import OpenAI
-    AI_AVAILABLE = True
-except ImportError:
-    AI_AVAILABLE = False
+AI_AVAILABLE = importlib.util.find_spec('openai') is not None
+try: import resource
+except ImportError: resource = None
+
+# asyncio, sqlite3, socket, concurrent.futures, the archive and compression modules are imported where they are used,
+# so a plain preview does not pay for the daemon, cache, batch or AI paths at startup
+@lru_cache(None)
+def optional_import(name):
+    # Heavy optional dependencies (openai, numpy) and the decompressors load on first use, not at startup
+    try: return importlib.import_module(name)
+    except ImportError: return None
 
 Colors = type('', (), {'RESET':'\033[0m','BOLD':'\033[1m','RED':'\033[91m','GREEN':'\033[92m','YELLOW':'\033[93m','BLUE':'\033[94m','MAGENTA':'\033[95m','CYAN':'\033[96m','GRAY':'\033[90m'})()
 
+Analysis = namedtuple('Analysis', 'stats code_stats patterns security urls')
+# One line-start alternation for all code counters; the group that matched names the counter
+CODE_PATTERN = re.compile(r'^\s*(?:(?P<functions>def |function\s)|(?P<classes>class\s)|(?P<comments>#)|(?P<imports>import |from ))', re.MULTILINE)
+# Each data pattern opens with a literal ('h', '@', '.') so re skips to candidates instead of trying every offset;
+# emails and IPs check what precedes the literal with lookbehinds. Only the url matches are kept as strings.
+DATA_PATTERNS = {'urls': re.compile(r'https?://[^\s<>"\']+'), 'emails': re.compile(r'@(?<=[A-Za-z0-9._%+-]@)[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+    'ips': re.compile(r'\.(?:(?<=(?<!\w)\d\.)|(?<=(?<!\w)\d\d\.)|(?<=(?<!\w)\d\d\d\.))\d{1,3}\.\d{1,3}\.\d{1,3}\b')}
+SENSITIVE_PATTERN = re.compile(r'(?:password|secret|key|token|api|auth)[^\n]*')
+
+def iter_chunks(source, chunk=1 << 20, encoding='utf-8'):
+    if isinstance(source, str):
+        start = 0
+        while start < len(source):
+            end = source.find('\n', start + chunk) + 1 or len(source)
+            yield source[start:end]
+            start = end
+        return
+    if isinstance(source, (bytes, bytearray, mmap.mmap)): source = io.BufferedReader(MappedReader(source), chunk)
+    tail = b''
+    for block in iter(lambda: source.read(chunk), b''):
+        block = tail + block
+        cut = block.rfind(b'\n') + 1 or (len(block) if len(block) >= 4 * chunk else 0)
+        tail = block[cut:]
+        if cut: yield block[:cut].decode(encoding, 'ignore')
+    if tail: yield tail.decode(encoding, 'ignore')
+
+TIMESTAMP_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2}[\s\t]\d{2}:\d{2}:\d{2})')
+INDEX_TIMESTAMP = r'\s*(\d{4}-\d{2}-\d{2})[\sT](\d{2}:\d{2}:\d{2})'
+INDEX_TIMESTAMP_PATTERN,INDEX_TIMESTAMP_BYTES = re.compile(INDEX_TIMESTAMP),re.compile(INDEX_TIMESTAMP.encode())
+LOG_LEVELS = [('error', ['ERROR', 'FAIL', 'FATAL'], Colors.RED), ('warn', ['WARN', 'WARNING'], Colors.YELLOW), ('info', ['INFO', 'SUCCESS'], Colors.GREEN), ('debug', ['DEBUG', 'TRACE'], Colors.GRAY)]
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2})?)?')
+AI_PROMPTS = {'python':'Analyze this Python code structure','javascript':'Analyze this JavaScript functionality','shell':'Analyze this shell script','html':'Analyze this HTML structure','css':'Analyze this CSS styling','sql':'Analyze this SQL query','json':'Analyze this JSON data','csv':'Analyze this CSV dataset','log':'Analyze this log file for events and issues'}
+SIGNATURES = [(0, b'\x89PNG\r\n\x1a\n', 'png'), (0, b'\xff\xd8\xff', 'jpeg'), (0, b'GIF87a', 'gif'), (0, b'GIF89a', 'gif'), (8, b'WEBP', 'webp'), (0, b'%PDF-', 'pdf'),
+    (0, b'PK\x03\x04', 'zip'), (0, b'PK\x05\x06', 'zip'), (0, b'\x1f\x8b\x08', 'gzip'), *((0, b'BZh' + bytes([level]), 'bzip2') for level in b'123456789'), (0, b'\xfd7zXZ\x00', 'xz'),
+    (0, b'(\xb5/\xfd', 'zstd'), (0, b"7z\xbc\xaf'\x1c", '7z'), (257, b'ustar', 'tar'), (0, b'\x7fELF', 'elf'), (0, b'\xca\xfe\xba\xbe', 'class'), (0, b'\x00asm', 'wasm'),
+    (0, b'SQLite format 3\x00', 'sqlite'), (4, b'ftyp', 'mp4')]
+BINARY_TYPES = ['binary', *dict.fromkeys(file_type for _, _, file_type in SIGNATURES)]
+EXTENSION_TYPES = {'.json':'json','.ndjson':'ndjson','.jsonl':'ndjson','.yaml':'yaml','.yml':'yaml','.csv':'csv','.tsv':'tsv','.xml':'xml','.log':'log','.conf':'config','.cfg':'config','.py':'python','.js':'javascript','.html':'html','.css':'css','.md':'markdown','.sql':'sql','.sh':'shell','.env':'env','.ini':'config'}
+BOMS = [(codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'), (codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')]
+WIDE_ENCODINGS = ('utf-16', 'utf-32')
+SHEBANGS = [('python', 'python'), ('node', 'javascript'), ('sh', 'shell')]
+CONTROL_BYTES = bytes(set(range(32)) - set(b'\t\n\r\f\b\x1b') | {127})
+Detection = namedtuple('Detection', 'file_type encoding')
+DECOMPRESSORS = {'gzip': 'gzip', 'bzip2': 'bz2', **({'xz': 'lzma'} if importlib.util.find_spec('_lzma') else {})}
+COMPRESSED_SUFFIXES = {'.gz': '', '.gzip': '', '.bz2': '', '.xz': '', '.tgz': '.tar', '.tbz2': '.tar', '.txz': '.tar'}
+
+def walk_files(path, recursive=True):
+    try: entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+    except OSError: return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive: yield from walk_files(entry.path)
+            elif entry.is_file(): yield entry.path
+        except OSError: continue
+
+def scan_init(signatures=None):
+    global _scanner
+    _scanner = FilePreview()
+    if signatures: _scanner.plugins.signatures = signatures
+
+def scan_file(filepath):
+    if '_scanner' not in globals(): scan_init()
+    start,cpu = time.perf_counter(),time.process_time()
+    try:
+        file_type,encoding = _scanner.sniff(filepath)
+        if _scanner.is_binary(file_type):
+            stat = os.stat(filepath)
+            result = Analysis({'lines': 0, 'words': 0, 'chars': 0, 'size': stat.st_size, 'perms': oct(stat.st_mode)[-3:]}, {}, {}, _scanner.permission_flags(stat.st_mode), [])
+        else: result = _scanner.analyze_file_comprehensive(filepath, None, file_type, encoding)
+        return filepath, file_type, result, None, (time.perf_counter() - start, time.process_time() - cpu)
+    except Exception as e: return filepath, None, None, str(e)[:60], (time.perf_counter() - start, time.process_time() - cpu)
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+def log_severity(line):
+    upper = line.upper()
+    for level, words, color in LOG_LEVELS:
+        if any(word in upper for word in words): return level, color
+    return None, Colors.RESET
+
+def map_file(f):
+    try: return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError): return nullcontext(f.read())
+
+def hash_digests(source, algorithms=('md5', 'sha1', 'sha256'), chunk=1 << 22, limit=None):
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as f, map_file(f) as data: return hash_digests(data, algorithms, chunk, limit)
+    hashers = {name: hashlib.new(name) for name in algorithms}
+    with memoryview(source) as view:
+        view = view[:limit] if limit is not None else view
+        def feed(hasher):
+            for start in range(0, len(view), chunk): hasher.update(view[start:start + chunk])
+            return hasher.hexdigest()
+        if len(hashers) == 1 or len(view) <= chunk: digests = {name: feed(hasher) for name, hasher in hashers.items()}
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=len(hashers)) as pool: digests = dict(zip(hashers, pool.map(feed, hashers.values())))
+        del view
+    return digests
+
+JSON_TOKEN = re.compile(r'(?P<string>"(?:[^"\\]|\\.)*")|(?P<open>"(?:[^"\\]|\\.)*\\?)|(?P<punct>[{}\[\],:])|(?P<literal>[^\s{}\[\],:"]+)')
+JSON_CLOSERS = {'{': '}', '[': ']'}
+
+def json_tokens(f, chunk=1 << 16):
+    buffer,eof = '',False
+    while not eof:
+        data = f.read(chunk)
+        eof,buffer,pos = not data,buffer + data,0
+        for m in JSON_TOKEN.finditer(buffer):
+            if not eof and (m.lastgroup == 'open' or m.end() == len(buffer)): break
+            yield m.group()
+            pos = m.end()
+        buffer = buffer[pos:]
+
+JSON_STRING,JSON_NUMBER,JSON_EMPTY = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"'),re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?'),re.compile(r'[{\[]\s*[}\]]')
+
+def pretty_json_line_count(text):
+    # What pretty_json_lines would yield for valid JSON, without tokenizing: a line per comma, two per non-empty container, plus the last
+    bare = JSON_STRING.sub('""', text)
+    return 1 + bare.count(',') + 2 * (bare.count('{') + bare.count('[') - len(JSON_EMPTY.findall(bare)))
+
+def checked_json_tokens(tokens, problems):
+    # Passes tokens through unchanged while tracking bracket balance and what may come next; the first grammar error is appended to problems
+    stack,expect = [],'value'
+    for count, token in enumerate(tokens, 1):
+        if not problems:
+            error,value = None,expect in ('value', 'item_or_close')
+            if token in JSON_CLOSERS:
+                if value: stack.append(token); expect = 'key_or_close' if token == '{' else 'item_or_close'
+                else: error = f"unexpected '{token}'"
+            elif token in ('}', ']'):
+                if stack and JSON_CLOSERS[stack[-1]] == token and expect in ('comma_or_close', 'key_or_close' if token == '}' else 'item_or_close'): stack.pop(); expect = 'comma_or_close' if stack else 'end'
+                else: error = f"unbalanced '{token}'" if not stack or JSON_CLOSERS[stack[-1]] != token else f"unexpected '{token}'"
+            elif token == ',':
+                if expect == 'comma_or_close': expect = 'key' if stack[-1] == '{' else 'value'
+                else: error = "unexpected ','"
+            elif token == ':':
+                if expect == 'colon': expect = 'value'
+                else: error = "unexpected ':'"
+            elif token[0] == '"' and not JSON_STRING.fullmatch(token): error = 'unterminated string'
+            elif token[0] == '"' and expect in ('key', 'key_or_close'): expect = 'colon'
+            elif value and (token[0] == '"' or token in ('true', 'false', 'null') or JSON_NUMBER.fullmatch(token)): expect = 'comma_or_close' if stack else 'end'
+            else: error = f"unexpected {token[:20]!r}" if expect != 'end' else f"trailing data {token[:20]!r}"
+            if error: problems.append(f"{error} at token {count:,}")
+        yield token
+    if not problems and (stack or expect != 'end'): problems.append(f"unclosed '{stack[-1]}'" if stack else 'no value')
+
+def pretty_json_lines(tokens, indent=2):
+    depth,line,pushback = 0,'',[]
+    while True:
+        token = pushback.pop() if pushback else next(tokens, None)
+        if token is None: break
+        if token in JSON_CLOSERS:
+            nxt = next(tokens, None)
+            if nxt == JSON_CLOSERS[token]: line += token + nxt; continue
+            yield line + token
+            depth += 1
+            line = ' ' * indent * depth
+            if nxt is not None: pushback.append(nxt)
+        elif token in ('}', ']'):
+            if line.strip(): yield line
+            depth = max(depth - 1, 0)
+            line = ' ' * indent * depth + token
+        elif token == ',': yield line + ','; line = ' ' * indent * depth
+        elif token == ':': line += ': '
+        else: line += token
+    if line.strip(): yield line
+
+def json_scalar_kind(token): return 'string' if token[0] == '"' else 'boolean' if token in ('true', 'false') else 'null' if token == 'null' else 'number'
+
+def json_structure(tokens):
+    frames,children,top,depth,key = [],{},None,0,None
+    for token in tokens:
+        if token in JSON_CLOSERS:
+            if frames: frames[-1][2] = True
+            frames.append([token, 0, False, key if len(frames) == 1 and frames[0][0] == '{' else None, True])
+            depth = max(depth, len(frames))
+        elif token in ('}', ']'):
+            if not frames: break
+            opener,commas,has_items,parent_key,_ = frames.pop()
+            info = ('object' if opener == '{' else 'array', commas + 1 if has_items else 0)
+            if not frames: top = info
+            elif len(frames) == 1 and parent_key is not None: children[parent_key] = info
+        elif token == ',':
+            if frames: frames[-1][1] += 1; frames[-1][4] = True
+        elif token == ':':
+            if frames: frames[-1][4] = False
+        elif not frames: top = (json_scalar_kind(token), 0)
+        else:
+            frame = frames[-1]
+            frame[2] = True
+            if frame[0] == '{' and frame[4]:
+                if len(frames) == 1:
+                    try: key = json.loads(token)
+                    except ValueError: key = token
+                continue
+            if len(frames) == 1 and frame[0] == '{': children[key] = (json_scalar_kind(token), 0)
+    return top, children, depth
+
+def count_lines(f, chunk=1 << 20):
+    count,last = 0,b'\n'
+    for block in iter(lambda: f.read(chunk), b''): count,last = count + block.count(b'\n'),block[-1:]
+    return count + (last != b'\n')
+
+class SignatureTrie:
+    def __init__(self, signatures=()):
+        self.roots,self.types = [],set()
+        for offset, magic, file_type in signatures: self.add(magic, file_type, offset)
+    def add(self, magic, file_type, offset=0):
+        node = next((root for start, root in self.roots if start == offset), None)
+        if node is None: node = {}; self.roots = sorted(self.roots + [(offset, node)], key=lambda root: root[0])
+        for byte in magic: node = node.setdefault(byte, {})
+        node[None] = file_type
+        self.types.add(file_type)
+    def match(self, header):
+        for offset, node in self.roots:
+            if offset >= len(header): break
+            found = None
+            for byte in header[offset:]:
+                node = node.get(byte)
+                if node is None: break
+                found = node.get(None, found)
+            if found: return found
+
+def sniff_encoding(header):
+    if header.isascii() and b'\x00' not in header: return 'utf-8'
+    for bom, encoding in BOMS:
+        if header.startswith(bom): return encoding
+    if b'\x00' in header:
+        # NUL parity means nothing on a few bytes; a BOM-less UTF-16 guess also has to decode to mostly printable text
+        if len(header) < 16: return None
+        even,odd = header[0::2].count(0),header[1::2].count(0)
+        encoding = 'utf-16-le' if odd > len(header) // 4 and not even else 'utf-16-be' if even > len(header) // 4 and not odd else None
+        text = header[:len(header) & ~1].decode(encoding, 'ignore') if encoding else ''
+        return encoding if text and sum(char.isprintable() or char in '\t\n\r' for char in text) >= len(text) * 0.9 else None
+    try: codecs.getincrementaldecoder('utf-8')().decode(header); return 'utf-8'
+    except UnicodeDecodeError: return 'cp1252' if len(header.translate(None, CONTROL_BYTES)) > len(header) * 0.9 else None
+
+def sniff_text_type(text, complete=True):
+    stripped = text.lstrip()
+    if stripped.startswith('#!'):
+        shebang = stripped.split('\n', 1)[0]
+        return next((file_type for word, file_type in SHEBANGS if word in shebang), 'shell')
+    if stripped.startswith('<?xml'): return 'xml'
+    if stripped[:15].lower().startswith(('<!doctype html', '<html')): return 'html'
+    lines = [line for line in text.splitlines()[:None if complete else -1] if line.strip()][:20]
+    if stripped.startswith(('{', '[')):
+        if len(lines) > 1 and all(line.lstrip().startswith('{') and line.rstrip().endswith('}') for line in lines):
+            try: json.loads(lines[0]); return 'ndjson'
+            except ValueError: pass
+        return 'json'
+    if len(lines) < 2: return 'text'
+    if sum(bool(DATE_PATTERN.search(line[:40])) for line in lines) >= len(lines) * 0.6: return 'log'
+    for delimiter, file_type in (('\t', 'tsv'), (',', 'csv'), (';', 'csv'), ('|', 'csv')):
+        counts = {line.count(delimiter) for line in lines}
+        if len(counts) == 1 and counts != {0}: return file_type
+    return 'text'
+
+class LineReader:
+    def __init__(self, f, encoding='utf-8', limit=1 << 16): self.f,self.encoding,self.limit,self.consumed,self.text = f,encoding,limit,0,None
+    def __iter__(self):
+        source,empty,newline = self.f,b'',b'\n'
+        if self.encoding.startswith(WIDE_ENCODINGS):
+            # A b'\n' byte is only half (or a quarter) of a UTF-16/32 newline, so split decoded text instead
+            self.text = io.TextIOWrapper(io.BufferedReader(StreamReader(self.f)), encoding=self.encoding, errors='ignore')
+            source,empty,newline = self.text,'','\n'
+        for raw in iter(lambda: source.readline(self.limit), empty):
+            if not raw.endswith(newline):
+                for rest in iter(lambda: source.readline(self.limit), empty):
+                    if rest.endswith(newline): break
+            self.consumed += 1
+            yield (raw if self.text else raw.decode(self.encoding, 'ignore')).rstrip('\r\n')
+    def remaining(self):
+        if not self.text: return count_lines(self.f)
+        count,last = 0,'\n'
+        for block in iter(lambda: self.text.read(1 << 20), ''): count,last = count + block.count('\n'),block[-1:]
+        return count + (last != '\n')
+
+def byte_order(encoding, header):
+    # BOM codecs only read the byte order at offset 0; tail and follow decode from the middle, so pin it down
+    if encoding in WIDE_ENCODINGS:
+        for bom, name in BOMS:
+            if name == encoding and header.startswith(bom): return f"{encoding}-{'le' if bom[0] == 0xff else 'be'}"
+    return encoding
+
+class AnalysisCache:
+    def __init__(self, path=None, max_entries=200000, max_bytes=256 * 1024 * 1024):
+        self.path = Path(path or Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'raptors' / 'analysis.db')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        import sqlite3
+        self.db,self.lock = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False),threading.RLock()
+        self.db.execute('PRAGMA journal_mode=WAL')
+        # REPLACE only fires the delete trigger with recursive triggers on, and the totals depend on it
+        self.db.execute('PRAGMA recursive_triggers=ON')
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            self.db.execute('CREATE TABLE IF NOT EXISTS entries (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, fingerprint TEXT, data TEXT, accessed REAL)')
+            self.db.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT, accessed REAL)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+            # Running row count and byte total, kept by triggers so a flush never has to scan the table to check the limits
+            if not self.db.execute("SELECT 1 FROM sqlite_master WHERE name = 'totals'").fetchone():
+                self.db.execute('CREATE TABLE totals (id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER, bytes INTEGER)')
+                self.db.execute('INSERT INTO totals SELECT 0, COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM entries')
+            self.db.execute('CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN UPDATE totals SET entries = entries + 1, bytes = bytes + LENGTH(NEW.data); END')
+            self.db.execute('CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN UPDATE totals SET entries = entries - 1, bytes = bytes - LENGTH(OLD.data); END')
+            self.db.execute('CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF data ON entries BEGIN UPDATE totals SET bytes = bytes + LENGTH(NEW.data) - LENGTH(OLD.data); END')
+        self.max_entries,self.max_bytes = max_entries,max_bytes
+        self.entries,self.dirty,self.touched,self.responded = {},set(),set(),False
+        self.hits,self.misses,self.stale = 0,0,0
+    def fingerprint(self, filepath, size, block=4096):
+        digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+        with open(filepath, 'rb') as f:
+            digest.update(f.read(block))
+            if size > 2 * block: f.seek(-block, os.SEEK_END); digest.update(f.read(block))
+        return digest.hexdigest()
+    def get(self, filepath):
+        with self.lock: return self._get(filepath)
+    def _get(self, filepath):
+        key = os.path.abspath(filepath)
+        if key in self.entries: return self.entries[key][2]
+        try:
+            stat = os.stat(key)
+            identity,fingerprint = (stat.st_size, stat.st_mtime_ns, stat.st_ino),self.fingerprint(key, stat.st_size)
+        except OSError: return {}
+        row,data = self.db.execute('SELECT size, mtime_ns, inode, fingerprint, data FROM entries WHERE path = ?', (key,)).fetchone(),{}
+        if row and tuple(row[:3]) == identity and row[3] == fingerprint: self.hits,data = self.hits + 1,json.loads(row[4]); self.touched.add(key)
+        else: self.misses,self.stale = self.misses + 1,self.stale + bool(row)
+        self.entries[key] = (identity, fingerprint, data)
+        return data
+    def update(self, filepath, **values):
+        key = os.path.abspath(filepath)
+        with self.lock:
+            if key not in self.entries: self._get(key)
+            if key not in self.entries: return
+            self.entries[key][2].update(values)
+            self.dirty.add(key)
+    def get_response(self, key):
+        with self.lock:
+            row = self.db.execute('SELECT response FROM responses WHERE key = ?', (key,)).fetchone()
+            if row: self.db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (time.time(), key))
+        return row[0] if row else None
+    def put_response(self, key, response):
+        with self.lock: self.db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?)', (key, response, time.time())); self.responded = True
+    def evict(self):
+        if self.responded: self.db.execute('DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)', (self.max_entries // 10,))
+        doomed = 0
+        count,total = self.db.execute('SELECT entries, bytes FROM totals').fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            # Over the byte limit, guess the victims from the mean entry size; the loop picks up any shortfall
+            victims = count - self.max_entries if count > self.max_entries else -(-(total - self.max_bytes) * count // total)
+            deleted = self.db.execute('DELETE FROM entries WHERE path IN (SELECT path FROM entries ORDER BY accessed LIMIT ?)', (max(victims, 1),)).rowcount
+            if not deleted: break
+            doomed += deleted
+            count,total = self.db.execute('SELECT entries, bytes FROM totals').fetchone()
+        return doomed
+    def flush(self):
+        with self.lock: self._flush()
+    def _flush(self):
+        now = time.time()
+        self.db.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)', [(key, *self.entries[key][0], self.entries[key][1], json.dumps(self.entries[key][2]), now) for key in self.dirty])
+        self.db.executemany('UPDATE entries SET accessed = ? WHERE path = ?', [(now, key) for key in self.touched - self.dirty])
+        self.evict()
+        self.db.commit()
+        # Drop the in-memory memo so a long-lived process revalidates files on the next lookup
+        self.entries,self.dirty,self.touched,self.responded = {},set(),set(),False
+    def close(self): self.flush(); self.db.close()
+    def stats(self):
+        count,total = self.db.execute('SELECT entries, bytes FROM totals').fetchone()
+        return {'entries': count, 'bytes': total, 'hits': self.hits, 'misses': self.misses, 'stale': self.stale, 'path': str(self.path)}
+
+class HyperLogLog:
+    def __init__(self, p=12): self.p,self.registers = p,bytearray(1 << p)
+    def add(self, value):
+        x = int.from_bytes(hashlib.blake2b(value.encode('utf-8', 'ignore'), digest_size=8).digest(), 'big')
+        index,rest = x >> (64 - self.p),x & ((1 << (64 - self.p)) - 1)
+        self.registers[index] = max(self.registers[index], 64 - self.p - rest.bit_length() + 1)
+    def count(self):
+        m = len(self.registers)
+        estimate,zeros = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers),self.registers.count(0)
+        return round(m * math.log(m / zeros)) if estimate <= 2.5 * m and zeros else round(estimate)
+
+class ColumnProfile:
+    NULLS = {'', 'null', 'none', 'na', 'n/a', 'nan'}
+    def __init__(self): self.count,self.nulls,self.types,self.bounds,self.distinct = 0,0,Counter(),{},HyperLogLog()
+    def add(self, value):
+        self.count += 1
+        text = value.strip()
+        if text.lower() in self.NULLS: self.nulls += 1; return
+        kind,key = infer_value(text)
+        self.types[kind] += 1
+        self.distinct.add(text)
+        bucket = 'number' if kind in ('int', 'float') else kind
+        low,high = self.bounds.get(bucket, (key, key))
+        self.bounds[bucket] = (min(low, key), max(high, key))
+    def summary(self):
+        if not self.types: return 'null', '', ''
+        kind = self.types.most_common(1)[0][0]
+        if kind in ('int', 'float') and 'float' in self.types: kind = 'float'
+        return (kind, *self.bounds['number' if kind in ('int', 'float') else kind])
+
+def infer_value(text):
+    for kind, parse in (('int', int), ('float', float)):
+        try: return kind, parse(text)
+        except ValueError: pass
+    if text.lower() in ('true', 'false', 'yes', 'no'): return 'bool', text.lower()
+    return ('date' if DATE_PATTERN.match(text) else 'str'), text
+
+class LogIndex:
+    def __init__(self, filepath, step=1000, sidecar=False):
+        self.filepath,self.step = filepath,step
+        self.path = self.locate(filepath, sidecar)
+        self.data = self.load()
+    @staticmethod
+    def locate(filepath, sidecar=False):
+        # Read-only queries never write next to the log; only an explicit --index asks for the <log>.rpidx sidecar
+        if sidecar:
+            path = filepath + '.rpidx'
+            if os.access(path, os.W_OK) or (not os.path.exists(path) and os.access(os.path.dirname(os.path.abspath(filepath)), os.W_OK)): return path
+        root = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'raptors' / 'index'
+        root.mkdir(parents=True, exist_ok=True)
+        return str(root / (hashlib.blake2b(os.path.abspath(filepath).encode(), digest_size=16).hexdigest() + '.rpidx'))
+    def load(self):
+        empty = {'inode': None, 'offset': 0, 'lines': 0, 'checkpoints': [], 'severity': {}, 'first': None, 'last': None, 'step': self.step}
+        try:
+            with open(self.path) as f: data = json.load(f)
+            stat = os.stat(self.filepath)
+            return data if data.get('inode') == stat.st_ino and data.get('offset', 0) <= stat.st_size and data.get('step') == self.step else empty
+        except (OSError, ValueError): return empty
+    def update(self):
+        data,stat = self.data,os.stat(self.filepath)
+        if data['offset'] == stat.st_size and data['inode'] == stat.st_ino: return data
+        if data['inode'] != stat.st_ino or data['offset'] > stat.st_size: self.data = data = {**data, 'inode': stat.st_ino, 'offset': 0, 'lines': 0, 'checkpoints': [], 'severity': {}, 'first': None, 'last': None}
+        severity,since_checkpoint = Counter(data['severity']),data['lines'] - (data['checkpoints'][-1][1] if data['checkpoints'] else -self.step)
+        with open(self.filepath, 'rb') as f:
+            f.seek(data['offset'])
+            for line in f:
+                if not line.endswith(b'\n'): break
+                match = INDEX_TIMESTAMP_BYTES.match(line)
+                if match:
+                    ts = f"{match.group(1).decode()} {match.group(2).decode()}"
+                    data['first'],data['last'] = data['first'] or ts,ts
+                    if since_checkpoint >= self.step: data['checkpoints'].append([data['offset'], data['lines'], ts]); since_checkpoint = 0
+                level = log_severity(line.decode('utf-8', 'ignore'))[0]
+                if level: severity[level] += 1
+                data['offset'],data['lines'],since_checkpoint = data['offset'] + len(line),data['lines'] + 1,since_checkpoint + 1
+        data['severity'] = dict(severity)
+        try:
+            with open(self.path, 'w') as f: json.dump(data, f)
+        except OSError: pass
+        return data
+    def slice(self, since=None, until=None):
+        since,until = (value.replace('T', ' ') if value else value for value in (since, until))
+        checkpoints = self.data['checkpoints']
+        start = bisect.bisect_left([c[2] for c in checkpoints], since) - 1 if since else -1
+        current = checkpoints[start][2] if start >= 0 else None
+        with open(self.filepath, 'rb') as f:
+            f.seek(checkpoints[start][0] if start >= 0 else 0)
+            for line in LineReader(f):
+                match = INDEX_TIMESTAMP_PATTERN.match(line)
+                if match: current = f"{match.group(1)} {match.group(2)}"
+                if until and current and current[:len(until)] > until: return
+                if (not since or (current and current[:len(since)] >= since)) and line.strip(): yield line
+
+class AIPipeline:
+    def __init__(self, client_factory, model="gpt-4o-mini", concurrency=4, chunk_tokens=3000, max_chunks=8, retries=5, cache=None):
+        self.client_factory,self.model,self.concurrency,self.retries,self.cache = client_factory,model,concurrency,retries,cache
+        self.chunk_chars,self.max_chunks,self.fan_in = chunk_tokens * 4,max_chunks,8
+        self.memo,self.calls,self.cached_hits = {},0,0
+    def run(self, job):
+        import asyncio
+        async def main():
+            self.client,self.semaphore,self.inflight,self.blocking = self.client_factory(),asyncio.Semaphore(self.concurrency),{},None
+            return await job()
+        return asyncio.run(main())
+    def chunks(self, source, encoding='utf-8'):
+        # Returns (chunks, total): every newline-aligned chunk, or an even sample of max_chunks of them (0 = no cap)
+        if not isinstance(source, str):
+            size = os.path.getsize(source)
+            total = max(1, -(-size // self.chunk_chars))
+            with open(source, 'rb') as f:
+                if not self.max_chunks or total <= self.max_chunks: return self.chunks(f.read().decode(encoding, 'ignore'), encoding)
+                encoding,windows = byte_order(encoding, f.read(4)),[]
+                for i in range(self.max_chunks):
+                    f.seek(i * size // self.max_chunks // 4 * 4)
+                    windows.append(f.read(self.chunk_chars).decode(encoding, 'ignore'))
+            return windows,total
+        pieces,start = [],0
+        while start < len(source):
+            cut = source.rfind('\n', start, start + self.chunk_chars) + 1 if len(source) - start > self.chunk_chars else len(source)
+            cut = cut if cut > start else start + self.chunk_chars
+            pieces.append(source[start:cut])
+            start = cut
+        if not self.max_chunks or len(pieces) <= self.max_chunks: return pieces,len(pieces)
+        step = -(-len(pieces) // self.max_chunks)
+        return pieces[::step][:self.max_chunks],len(pieces)
+    async def complete(self, prompt, max_tokens=300):
+        import asyncio
+        key = hashlib.sha256(f"{self.model}\0{max_tokens}\0{prompt}".encode('utf-8', 'ignore')).hexdigest()
+        if key in self.memo: self.cached_hits += 1; return self.memo[key]
+        stored = self.cache.get_response(key) if self.cache else None
+        if stored is not None: self.cached_hits += 1; self.memo[key] = stored; return stored
+        if key not in self.inflight: self.inflight[key] = asyncio.ensure_future(self.request(prompt, max_tokens))
+        else: self.cached_hits += 1
+        response = await self.inflight[key]
+        self.memo[key] = response
+        if self.cache: self.cache.put_response(key, response)
+        return response
+    async def request(self, prompt, max_tokens):
+        import asyncio,inspect
+        create = self.client.chat.completions.create
+        call = partial(create, model=self.model, messages=[{"role": "user", "content": prompt}], max_tokens=max_tokens)
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.semaphore:
+                    self.calls += 1
+                    # SDK decorators hide async create() behind sync wrappers, so judge the result, not the function;
+                    # once a client has returned a plain value, send later calls through the executor to keep the loop free
+                    if self.blocking: response = await asyncio.get_running_loop().run_in_executor(None, call)
+                    else:
+                        response = call()
+                        self.blocking = not inspect.isawaitable(response)
+                        if not self.blocking: response = await response
+                return response.choices[0].message.content
+            except Exception as e:
+                status = getattr(e, 'status_code', None) or next((code for code in (429, 500, 502, 503, 504) if str(code) in str(e)), None)
+                retryable = status in (429, 500, 502, 503, 504) or isinstance(e, (asyncio.TimeoutError, ConnectionError)) or 'timeout' in type(e).__name__.lower() or 'connection' in type(e).__name__.lower()
+                if not retryable or attempt == self.retries: raise
+                headers = getattr(getattr(e, 'response', None), 'headers', None) or {}
+                try: delay = float(headers.get('retry-after'))
+                except (TypeError, ValueError): delay = min(30, 0.5 * 2 ** attempt) * (0.5 + random.random())
+                await asyncio.sleep(delay)
+    async def analyze(self, source, file_type, encoding='utf-8'):
+        instruction,(chunks, total) = AI_PROMPTS.get(file_type, f'Summarize this {file_type} file'),self.chunks(source, encoding)
+        if len(chunks) <= 1: return await self.complete(f"{instruction}:\n\n{chunks[0] if chunks else ''}")
+        import asyncio
+        parts = await asyncio.gather(*(self.complete(f"{instruction}. This is part {i + 1} of {len(chunks)} of one file; report only what this part shows:\n\n{chunk}") for i, chunk in enumerate(chunks)))
+        # Reduce at most fan_in summaries per request, level by level, so no combine prompt outgrows the context window
+        while len(parts) > 1:
+            groups = [parts[i:i + self.fan_in] for i in range(0, len(parts), self.fan_in)]
+            parts = await asyncio.gather(*(self.complete(f"{instruction}. Combine these partial analyses of the same file into one concise report:\n\n" + '\n\n'.join(f"Part {i + 1}:\n{part}" for i, part in enumerate(group)), max_tokens=500) if len(group) > 1 else asyncio.sleep(0, group[0]) for group in groups))
+        if len(chunks) == total: return parts[0]
+        return f"(Sampled {len(chunks)} of {total:,} chunks spread across the file - raise --ai-chunks, or 0 for all of it)\n{parts[0]}"
+    async def analyze_many(self, items):
+        import asyncio
+        return await asyncio.gather(*(self.analyze(source, file_type, encoding) for source, file_type, encoding in items), return_exceptions=True)
+
+class Metrics:
+    QUANTILES = (50, 90, 99)
+    def __init__(self):
+        self.stages,self.plugins,self.counters,self.lock = defaultdict(list),defaultdict(list),Counter(),threading.Lock()
+    @contextmanager
+    def stage(self, name):
+        start,cpu = time.perf_counter(),time.process_time()
+        try: yield
+        finally: self.record(name, time.perf_counter() - start, time.process_time() - cpu)
+    def record(self, name, wall, cpu=0.0):
+        with self.lock: self.stages[name].append((wall, cpu))
+    def record_plugin(self, name, wall, failed=False):
+        with self.lock:
+            self.plugins[name].append(wall)
+            if failed: self.counters[f'plugin_errors:{name}'] += 1
+    def count(self, name, value=1):
+        with self.lock: self.counters[name] += value
+    def peak_memory(self):
+        if not resource: return None
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)) * scale
+    def summary(self):
+        def timing(samples): return {'count': len(samples), 'total': sum(samples), 'max': max(samples, default=0.0), **{f'p{q}': percentile(samples, q) for q in self.QUANTILES}}
+        stages = {name: {**timing([wall for wall, _ in samples]), 'cpu': sum(cpu for _, cpu in samples)} for name, samples in self.stages.items()}
+        plugins = {name: {**timing(samples), 'errors': self.counters[f'plugin_errors:{name}']} for name, samples in self.plugins.items()}
+        counters = {name: value for name, value in self.counters.items() if not name.startswith('plugin_errors:')}
+        return {'stages': stages, 'plugins': plugins, 'counters': counters, 'peak_memory': self.peak_memory()}
+    def prometheus(self):
+        summary,lines = self.summary(),[]
+        for kind, label in (('stages', 'stage'), ('plugins', 'plugin')):
+            metric = f'raptors_{kind[:-1]}_seconds'
+            if summary[kind]: lines.append(f'# TYPE {metric} summary')
+            for name, values in summary[kind].items():
+                lines += [f'{metric}{{{label}="{name}",quantile="{q / 100}"}} {values[f"p{q}"]:.6f}' for q in self.QUANTILES]
+                lines += [f'{metric}_sum{{{label}="{name}"}} {values["total"]:.6f}', f'{metric}_count{{{label}="{name}"}} {values["count"]}']
+            if kind == 'stages' and summary[kind]: lines += ['# TYPE raptors_stage_cpu_seconds counter'] + [f'raptors_stage_cpu_seconds{{stage="{name}"}} {values["cpu"]:.6f}' for name, values in summary[kind].items()]
+        if summary['plugins']: lines += ['# TYPE raptors_plugin_errors_total counter'] + [f'raptors_plugin_errors_total{{plugin="{name}"}} {values["errors"]}' for name, values in summary['plugins'].items()]
+        for name, value in summary['counters'].items(): lines += [f'# TYPE raptors_{name}_total counter', f'raptors_{name}_total {value}']
+        if summary['peak_memory'] is not None: lines += ['# TYPE raptors_peak_memory_bytes gauge', f'raptors_peak_memory_bytes {summary["peak_memory"]}']
+        return '\n'.join(lines) + '\n'
+
+class MappedReader(io.RawIOBase):
+    def __init__(self, data): self.data,self.pos = data,0
+    def readable(self): return True
+    def seekable(self): return True
+    def readinto(self, buffer):
+        chunk = self.data[self.pos:self.pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self.pos += len(chunk)
+        return len(chunk)
+    def seek(self, offset, whence=io.SEEK_SET):
+        self.pos = max(0, (0, self.pos, len(self.data))[whence] + offset)
+        return self.pos
+    def tell(self): return self.pos
+
+class StreamReader(io.RawIOBase):
+    # Forward-only view of a decompressor or tar stream member; TextIOWrapper probes seekable() and the tar _Stream has none
+    def __init__(self, f): self.f = f
+    def readable(self): return True
+    def readinto(self, buffer):
+        chunk = self.f.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+class FileContext:
+    def __init__(self, filepath, file_type, previewer=None, encoding='utf-8'):
+        self.filepath,self.file_type,self.previewer,self.encoding = filepath,file_type,previewer,encoding
+        self.stat,self.cache = os.stat(filepath),previewer.cache if previewer else None
+        self.file,self.memos,self.locks,self.lock = None,{},{},threading.Lock()
+    def memo(self, name, compute):
+        with self.lock: lock = self.locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self.memos: self.memos[name] = compute()
+            return self.memos[name]
+    def map(self):
+        if self.previewer and self.previewer.metrics: self.previewer.metrics.count('bytes_read', self.stat.st_size)
+        self.file = open(self.filepath, 'rb')
+        try: return mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError): return self.file.read()
+    @property
+    def raw(self): return self.memo('raw', self.map)
+    @property
+    def text(self): return self.memo('text', lambda: self.raw[:].decode(self.encoding, 'ignore'))
+    @property
+    def line_offsets(self): return self.memo('line_offsets', lambda: array('Q', itertools.chain([0], (m.end() for m in re.finditer(b'\n', self.raw)))))
+    @property
+    def line_count(self): return self.memo('line_count', lambda: count_lines(self.stream()))
+    @property
+    def analysis(self):
+        if not self.previewer: return self.memo('analysis', lambda: FilePreview().analyze_file_comprehensive(self.filepath, self.memos.get('text') or self.raw, self.file_type, self.encoding))
+        return self.memo('analysis', lambda: self.previewer.cached_analysis(self.filepath, self.memos.get('text') or self.raw, self.file_type, self.encoding))
+    def digests(self, algorithms=('md5', 'sha1', 'sha256')): return self.memo(('digests', *algorithms), lambda: hash_digests(self.raw, algorithms))
+    def stream(self): return io.BufferedReader(MappedReader(self.raw), 1 << 16)
+    def close(self):
+        raw = self.memos.pop('raw', None)
+        if isinstance(raw, mmap.mmap): raw.close()
+        if self.file: self.file.close()
+
+class OutputRouter(io.TextIOBase):
+    def __init__(self, default): self.default,self.local = default,threading.local()
+    def write(self, text): return (getattr(self.local, 'buffer', None) or self.default).write(text)
+    def flush(self): (getattr(self.local, 'buffer', None) or self.default).flush()
+    def __getattr__(self, name): return getattr(self.default, name)
+    @contextmanager
+    def route(self, stream):
+        previous,self.local.buffer = getattr(self.local, 'buffer', None),stream
+        try: yield stream
+        finally: self.local.buffer = previous
+    def capture(self): return self.route(io.StringIO())
+
+Processor = namedtuple('Processor', 'fn name after context params')
+
 class PluginManager:
-    def __init__(self): self.handlers,self.processors = {},[]
+    def __init__(self): self.handlers,self.processors,self.workers,self.metrics,self.signatures = {},[],4,None,SignatureTrie(SIGNATURES)
     def load_plugin(self, plugin_path):
         try:
             spec = importlib.util.spec_from_file_location("plugin", plugin_path)
@@ -21,90 +693,284 @@ class PluginManager:
         except Exception as e: print(f"{Colors.RED}❌ Plugin error: {e}{Colors.RESET}")
         return False
     def register_handler(self, file_type, handler): self.handlers[file_type] = handler
-    def register_processor(self, processor): self.processors.append(processor)
+    def register_signature(self, magic, file_type, offset=0): self.signatures.add(magic, file_type, offset)
+    def register_processor(self, processor, name=None, after=(), context=False):
+        # context=True opts into fn(ctx); otherwise the legacy (filepath, content, file_type, ...) call is used
+        import inspect
+        params = () if context else inspect.signature(processor).parameters
+        self.processors.append(Processor(processor, name or processor.__name__, tuple(after), context, params))
     def get_handler(self, file_type): return self.handlers.get(file_type)
-    def process_file(self, filepath, content, file_type):
+    def ordered_processors(self):
+        names,ordered,placed = {p.name for p in self.processors},[],set()
+        pending = list(self.processors)
+        while pending:
+            ready = [p for p in pending if all(dep in placed or dep not in names for dep in p.after)] or pending[:1]
+            for p in ready: ordered.append(p); placed.add(p.name); pending.remove(p)
+        return ordered
+    def run_processor(self, processor, ctx, extras):
+        start,failed = time.perf_counter(),False
+        try:
+            if processor.context: processor.fn(ctx)
+            else:
+                views = {'analysis': lambda: ctx.analysis, 'cache': lambda: ctx.cache, **{k: (lambda v=v: v) for k, v in extras.items()}}
+                processor.fn(ctx.filepath, ctx.text, ctx.file_type, **{k: view() for k, view in views.items() if k in processor.params})
+        except Exception as e: failed = True; print(f"{Colors.YELLOW}⚠️ Processor error ({processor.name}): {e}{Colors.RESET}")
+        finally:
+            metrics = ctx.previewer.metrics if ctx.previewer else self.metrics
+            if metrics: metrics.record_plugin(processor.name, time.perf_counter() - start, failed)
+    def process_file(self, ctx, content=None, file_type=None, **extras):
+        if not isinstance(ctx, FileContext):
+            ctx = FileContext(ctx, file_type)
+            if content is not None: ctx.memos['text'] = content
+            if extras.get('analysis') is not None: ctx.memos['analysis'] = extras.pop('analysis')
+        processors = [p for p in self.ordered_processors() if p.context or ctx.stat.st_size <= (ctx.previewer.stream_threshold if ctx.previewer else float('inf')) or 'text' in ctx.memos]
+        if len(processors) <= 1 or self.workers <= 1:
+            for processor in processors: self.run_processor(processor, ctx, extras)
+            return
+        router = sys.stdout if isinstance(sys.stdout, OutputRouter) else OutputRouter(sys.stdout)
+        outputs,futures,previous = {},{},sys.stdout
+        def run(processor):
+            for dep in processor.after:
+                if dep in futures: futures[dep].result()
+            with router.capture() as buffer: self.run_processor(processor, ctx, extras)
+            outputs[processor.name] = buffer.getvalue()
+        from concurrent.futures import ThreadPoolExecutor
+        sys.stdout = router
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(processors))) as pool:
+                for processor in processors: futures[processor.name] = pool.submit(run, processor)
+        finally: sys.stdout = previous
         for processor in self.processors:
-            try: processor(filepath, content, file_type)
-            except Exception as e: print(f"{Colors.YELLOW}⚠️ Processor error: {e}{Colors.RESET}")
+            if processor.name in outputs: sys.stdout.write(outputs[processor.name])
 
 class FilePreview:
-    def __init__(self, use_ai=False, plugin_manager=None):
-        self.max_lines,self.max_width = 50,120
+    def __init__(self, use_ai=False, plugin_manager=None, ai_client=None):
+        self.max_lines,self.max_width,self.stream_threshold = 50,120,10 * 1024 * 1024
+        self.full_analysis,self.analysis_sample = False,4 * 1024 * 1024
         self.use_ai = use_ai and AI_AVAILABLE
         self.plugins = plugin_manager or PluginManager()
-        if self.use_ai:
+        self.cache,self.context,self.metrics,self.start_method = None,None,None,None
+        self.binary_offset,self.binary_length,self.show_entropy,self.strings_min,self.member = 0,None,False,0,None
+        self.csv_profile,self.csv_sample,self.json_structure = 'head',1000,False
+        self.tail,self.follow,self.since,self.until,self.build_index = None,False,None,None,False
+        self.ai,self.ai_concurrency,self.ai_chunks = None,4,8
+        if ai_client is not None: self.use_ai = use_ai
+        elif self.use_ai:
             api_key = os.environ.get("OPENAI_API_KEY")
-            self.openai = OpenAI(api_key=api_key) if api_key else None
-            self.use_ai = bool(self.openai)
-    def detect_type(self, filepath):
-        ext = Path(filepath).suffix.lower()
+            self.use_ai = bool(api_key)
+            ai_client = lambda: optional_import('openai').AsyncOpenAI(api_key=api_key)
+        if self.use_ai: self.ai = AIPipeline(ai_client if callable(ai_client) and not hasattr(ai_client, 'chat') else lambda: ai_client)
+    def sniff(self, filepath):
         try:
             with open(filepath, 'rb') as f: header = f.read(512)
-        except: return 'binary'
-        if b'\x00' in header:
-            if header.startswith(b'\x89PNG'): return 'png'
-            elif header.startswith((b'\xff\xd8\xff', b'JFIF')): return 'jpeg'
-            elif header.startswith(b'GIF8'): return 'gif'
-            elif header.startswith(b'%PDF'): return 'pdf'
-            return 'binary'
-        type_map = {'.json':'json','.yaml':'yaml','.yml':'yaml','.csv':'csv','.tsv':'tsv','.xml':'xml','.log':'log','.conf':'config','.cfg':'config','.py':'python','.js':'javascript','.html':'html','.css':'css','.md':'markdown','.sql':'sql','.sh':'shell','.env':'env','.ini':'config'}
-        return type_map.get(ext, 'text')
+        except OSError: return Detection('binary', None)
+        return self.sniff_header(header, filepath)
+    def sniff_header(self, header, name):
+        file_type = self.plugins.signatures.match(header)
+        if file_type: return Detection(file_type, None)
+        encoding = sniff_encoding(header)
+        if not encoding: return Detection('binary', None)
+        file_type = EXTENSION_TYPES.get(os.path.splitext(name)[1].lower())
+        return Detection(file_type or sniff_text_type(header.decode(encoding, 'ignore'), len(header) < 512), encoding)
+    def detect_type(self, filepath): return self.sniff(filepath).file_type
+    def is_binary(self, file_type): return file_type in BINARY_TYPES or file_type in self.plugins.signatures.types
+    def cached(self, filepath, key, compute, decode=lambda value: value):
+        entry = self.cache.get(filepath) if self.cache else {}
+        if key in entry: return decode(entry[key])
+        value = compute()
+        if self.cache: self.cache.update(filepath, **{key: value})
+        return value
+    def cached_analysis(self, filepath, content, file_type, encoding='utf-8'): return self.cached(filepath, 'analysis', lambda: self.analyze_file_comprehensive(filepath, content, file_type, encoding), Analysis._make)
     def format_size(self, size):
         for unit in ['B', 'KB', 'MB', 'GB']:
             if size < 1024: return f"{size:.1f}{unit}"
             size /= 1024
         return f"{size:.1f}TB"
-    def print_header(self, filepath, file_type, size):
+    def print_header(self, filepath, file_type, size, encoding=None):
         path = Path(filepath)
         modified = datetime.fromtimestamp(path.stat().st_mtime).strftime('%Y-%m-%d %H:%M')
         print(f"{Colors.BOLD}{Colors.CYAN}{'='*60}{Colors.RESET}")
         print(f"{Colors.BOLD}{Colors.BLUE}📄 {path.name}{Colors.RESET}")
-        print(f"{Colors.GRAY}Type: {file_type.upper()} | Size: {self.format_size(size)} | Modified: {modified}{Colors.RESET}")
+        print(f"{Colors.GRAY}Type: {file_type.upper()}{f' | Encoding: {encoding.upper()}' if encoding not in (None, 'utf-8') else ''} | Size: {self.format_size(size)} | Modified: {modified}{Colors.RESET}")
         print(f"{Colors.CYAN}{'='*60}{Colors.RESET}\n")
-    def print_lines(self, lines, colorize_func=None):
-        for i, line in enumerate(lines[:self.max_lines]):
+    def stage(self, name): return self.metrics.stage(name) if self.metrics else nullcontext()
+    def open_binary(self, filepath): return self.context.stream() if self.context and self.context.filepath == filepath else open(filepath, 'rb')
+    def count_file_lines(self, filepath):
+        with self.open_binary(filepath) as f: return count_lines(f)
+    def split_lines(self, content): return content.split('\n') if isinstance(content, str) else content
+    def print_lines(self, lines, colorize_func=None, remaining=None):
+        shown = 0
+        for i, line in enumerate(itertools.islice(lines, self.max_lines)):
             if len(line) > self.max_width: line = line[:self.max_width] + f"{Colors.GRAY}...{Colors.RESET}"
             colored_line = colorize_func(line) if colorize_func else line
             print(f"{Colors.GRAY}{i+1:3d}{Colors.RESET} {colored_line}")
-        if len(lines) > self.max_lines: print(f"{Colors.YELLOW}... {len(lines) - self.max_lines} more lines{Colors.RESET}")
+            shown += 1
+        if isinstance(lines, list): more = len(lines) - self.max_lines
+        else: more = remaining() if remaining and shown == self.max_lines else 0
+        if more > 0: print(f"{Colors.YELLOW}... {more:,} more lines{Colors.RESET}")
     def preview_json(self, content):
+        source,problems,total = io.StringIO(content) if isinstance(content, str) else content,[],None
+        if isinstance(content, str) and content.strip():
+            # Already in memory: validate and count every line up front, and show broken JSON as text
+            try: json.loads(content)
+            except ValueError as e:
+                print(f"{Colors.YELLOW}⚠️  Malformed JSON ({e.msg} at line {e.lineno}, column {e.colno}) - showing as text{Colors.RESET}\n")
+                return self.preview_text(content)
+            total = pretty_json_line_count(content)
+        tokens = checked_json_tokens(json_tokens(source), problems)
+        first = next(tokens, None)
+        if first is None or not (first in '{[' or first[0] in '"-0123456789' or first in ('true', 'false', 'null')):
+            if isinstance(content, str): return self.preview_text(content)
+            return print(f"{Colors.YELLOW}⚠️  Not valid JSON{Colors.RESET}")
+        def colorize(line): return re.sub(r'"([^"]+)":', f'{Colors.GREEN}"\\1"{Colors.RESET}:', line) if '"' in line and ':' in line else line
+        lines = pretty_json_lines(itertools.chain([first], tokens))
+        self.print_lines(lines, colorize, total and (lambda: total - self.max_lines))
+        if total is None and next(lines, None) is not None: print(f"{Colors.YELLOW}... more lines (streamed, not counted){Colors.RESET}")
+        if problems: print(f"{Colors.YELLOW}⚠️  Malformed JSON: {problems[0]} - the layout above may be off{Colors.RESET}")
+        if self.json_structure and source.seekable(): source.seek(0); self.show_json_structure(source)
+    def show_json_structure(self, source):
+        top,children,depth = json_structure(json_tokens(source))
+        if not top: return
+        print(f"\n{Colors.CYAN}🧭 Structure: {top[0]}({top[1]:,}) | depth {depth}{Colors.RESET}")
+        for key, (kind, length) in itertools.islice(children.items(), self.max_lines):
+            print(f"  {Colors.GREEN}{key}{Colors.RESET}: {kind}{f'({length:,})' if kind in ('object', 'array') else ''}")
+        if len(children) > self.max_lines: print(f"{Colors.YELLOW}  ... {len(children) - self.max_lines} more keys{Colors.RESET}")
+    def preview_ndjson(self, content, total=None):
+        lines = self.split_lines(content) if isinstance(content, str) else (line.rstrip('\r\n') for line in content)
+        keys,types,sampled,shown = Counter(),{},0,0
+        def colorize(line): return re.sub(r'"([^"]+)":', f'{Colors.GREEN}"\\1"{Colors.RESET}:', line)
+        for line in lines:
+            if not line.strip(): continue
+            try: record = json.loads(line)
+            except ValueError: record = None
+            if shown < self.max_lines:
+                shown += 1
+                text = json.dumps(record, ensure_ascii=False) if record is not None else f"{Colors.RED}✗ invalid: {line[:self.max_width]}{Colors.RESET}"
+                if len(text) > self.max_width: text = text[:self.max_width] + f"{Colors.GRAY}...{Colors.RESET}"
+                print(f"{Colors.GRAY}{shown:3d}{Colors.RESET} {colorize(text) if record is not None else text}")
+            sampled += 1
+            if isinstance(record, dict):
+                keys.update(record.keys())
+                for key, value in record.items(): types.setdefault(key, set()).add(type(value).__name__)
+            if sampled >= max(self.csv_sample, self.max_lines): break
+        if total is not None and total > shown: print(f"{Colors.YELLOW}... {total - shown:,} more records{Colors.RESET}")
+        if keys:
+            print(f"\n{Colors.CYAN}🧾 Record schema (first {sampled:,} records){Colors.RESET}")
+            for key, count in itertools.islice(keys.most_common(), self.max_lines): print(f"  {Colors.GREEN}{key:20.20}{Colors.RESET} {count / sampled:>6.1%}  {'/'.join(sorted(types[key]))}")
+    def preview_csv(self, filepath, file_type='csv'):
         try:
-            formatted = json.dumps(json.loads(content), indent=2, ensure_ascii=False)
-            lines = formatted.split('\n')
-            def colorize(line): return re.sub(r'"([^"]+)":', f'{Colors.GREEN}"\\1"{Colors.RESET}:', line) if '"' in line and ':' in line else line
-            self.print_lines(lines, colorize)
-        except: self.preview_text(content)
-    def preview_csv(self, filepath):
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f: rows = list(csv.reader(f))
-            if not rows: return
-            headers = rows[0]
-            print(f"{Colors.BOLD}{Colors.GREEN}Columns ({len(headers)}): {', '.join(headers)}{Colors.RESET}\n")
-            for i, row in enumerate(rows[:min(10, len(rows))]):
-                if i == 0:
-                    print(f"{Colors.CYAN}{' | '.join(f'{cell:15.15}' for cell in row)}{Colors.RESET}")
-                    print(f"{Colors.CYAN}{'-' * (len(headers) * 18)}{Colors.RESET}")
-                else:
-                    print(f"{Colors.GRAY}{i:2d}{Colors.RESET} {' | '.join(f'{str(cell):15.15}' for cell in row)}")
-            if len(rows) > 10: print(f"{Colors.YELLOW}... {len(rows) - 10} more rows{Colors.RESET}")
+            with io.TextIOWrapper(self.open_binary(filepath), encoding=self.context.encoding if self.context else 'utf-8', errors='ignore', newline='') as f: self.render_csv(f, file_type, self.count_file_lines(filepath))
         except Exception as e: print(f"{Colors.RED}Error reading CSV: {e}{Colors.RESET}")
-    def preview_log(self, content):
-        lines = content.split('\n')
-        def colorize(line):
-            line = line.strip()
-            if not line: return line
-            color = Colors.RESET
-            if any(word in line.upper() for word in ['ERROR', 'FAIL', 'FATAL']): color = Colors.RED
-            elif any(word in line.upper() for word in ['WARN', 'WARNING']): color = Colors.YELLOW
-            elif any(word in line.upper() for word in ['INFO', 'SUCCESS']): color = Colors.GREEN
-            elif any(word in line.upper() for word in ['DEBUG', 'TRACE']): color = Colors.GRAY
-            ts_match = re.match(r'(\d{4}-\d{2}-\d{2}[\s\t]\d{2}:\d{2}:\d{2})', line)
-            if ts_match:
-                ts,rest = ts_match.group(1),line[len(ts_match.group(1)):]
-                return f"{Colors.CYAN}{ts}{Colors.RESET}{color}{rest}{Colors.RESET}"
-            return f"{color}{line}{Colors.RESET}"
-        self.print_lines([line for line in lines if line.strip()], colorize)
+    def render_csv(self, f, file_type='csv', total=None):
+        head = list(itertools.islice(f, 100))
+        if not head: return
+        try: dialect = csv.Sniffer().sniff(''.join(head), delimiters='\t' if file_type == 'tsv' else ',;\t|')
+        except csv.Error: dialect = csv.excel_tab if file_type == 'tsv' else csv.excel
+        rows = csv.reader(itertools.chain(head, f), dialect)
+        headers = next(rows, [])
+        print(f"{Colors.BOLD}{Colors.GREEN}Columns ({len(headers)}): {', '.join(headers)}{Colors.RESET}\n")
+        print(f"{Colors.CYAN}{' | '.join(f'{cell:15.15}' for cell in headers)}{Colors.RESET}")
+        print(f"{Colors.CYAN}{'-' * (len(headers) * 18)}{Colors.RESET}")
+        profiles,sample,seen = [ColumnProfile() for _ in headers],[],0
+        for i, row in enumerate(rows, 1):
+            if i < 10: print(f"{Colors.GRAY}{i:2d}{Colors.RESET} {' | '.join(f'{str(cell):15.15}' for cell in row)}")
+            seen = i
+            if self.csv_profile == 'full': self.profile_row(profiles, row)
+            elif i <= self.csv_sample: sample.append(row)
+            elif self.csv_profile == 'reservoir':
+                j = random.randrange(i)
+                if j < self.csv_sample: sample[j] = row
+            elif i >= 10: break
+        if total is not None and total > 10: print(f"{Colors.YELLOW}... {total - 10:,} more rows{Colors.RESET}")
+        for row in sample: self.profile_row(profiles, row)
+        source = {'full': f"all {seen:,} rows", 'reservoir': f"reservoir sample of {len(sample):,}/{seen:,} rows"}.get(self.csv_profile, f"first {len(sample):,} rows")
+        self.show_csv_profile(headers, profiles, source)
+    def profile_row(self, profiles, row):
+        for profile, value in zip(profiles, row): profile.add(value)
+    def show_csv_profile(self, headers, profiles, source):
+        if not profiles or not profiles[0].count: return
+        print(f"\n{Colors.CYAN}🧮 Column Profile ({source}){Colors.RESET}")
+        print(f"{Colors.BOLD}{'column':15.15} {'type':6} {'nulls':>6} {'min':>15} {'max':>15} {'~distinct':>10}{Colors.RESET}")
+        for name, profile in itertools.islice(zip(headers, profiles), self.max_lines):
+            kind,low,high = profile.summary()
+            print(f"{Colors.GREEN}{name:15.15}{Colors.RESET} {kind:6} {profile.nulls / profile.count:>6.1%} {str(low):>15.15} {str(high):>15.15} {profile.distinct.count():>10,}")
+    def preview_log(self, content, remaining=None):
+        lines = self.split_lines(content)
+        colorize = self.colorize_log
+        non_empty = (line for line in lines if line.strip())
+        self.print_lines(list(non_empty) if isinstance(lines, list) else non_empty, colorize, remaining)
+    def colorize_log(self, line):
+        line = line.strip()
+        if not line: return line
+        color = log_severity(line)[1]
+        ts_match = TIMESTAMP_PATTERN.match(line)
+        if ts_match:
+            ts,rest = ts_match.group(1),line[len(ts_match.group(1)):]
+            return f"{Colors.CYAN}{ts}{Colors.RESET}{color}{rest}{Colors.RESET}"
+        return f"{color}{line}{Colors.RESET}"
+    def tail_lines(self, f, count, encoding='utf-8', block=1 << 16):
+        # encoding must be byte-order explicit (see byte_order); blocks stay aligned to its code unit so each decodes cleanly
+        width = len('\n'.encode(encoding)) if encoding.startswith(WIDE_ENCODINGS) else 1
+        end = f.seek(0, os.SEEK_END)
+        pos,data = end - end % width,b''
+        while pos > 0 and (data.count(b'\n') if width == 1 else data.decode(encoding, 'ignore').count('\n')) <= count:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+        lines = data.decode(encoding, 'ignore').lstrip('\ufeff' if pos == 0 else '').split('\n')
+        if lines and not lines[-1]: lines.pop()
+        return [line.rstrip('\r') for line in lines[-count:]] if count else []
+    def preview_log_slice(self, filepath):
+        encoding = self.context.encoding if self.context else 'utf-8'
+        if (self.since or self.until or self.build_index) and encoding.startswith(WIDE_ENCODINGS):
+            print(f"{Colors.YELLOW}⚠️  --since/--until/--index need an ASCII-compatible log, not {encoding.upper()}{Colors.RESET}")
+            if not (self.tail or self.follow): return
+        elif self.since or self.until or self.build_index:
+            index = LogIndex(filepath, sidecar=self.build_index)
+            index.update()
+            if self.build_index: self.show_log_index(index)
+            if self.since or self.until:
+                print(f"{Colors.CYAN}🕒 Lines from {self.since or 'start'} to {self.until or 'end'}{Colors.RESET}\n")
+                matches = list(itertools.islice(index.slice(self.since, self.until), self.max_lines + 1))
+                self.print_lines(matches[:self.max_lines], self.colorize_log)
+                if len(matches) > self.max_lines: print(f"{Colors.YELLOW}... more lines in range (raise -n to see more){Colors.RESET}")
+            if not (self.tail or self.follow): return
+        with open(filepath, 'rb') as f:
+            encoding = byte_order(encoding, f.read(4))
+            lines = self.tail_lines(f, self.tail if self.tail is not None else 10, encoding)
+            offset = f.seek(0, os.SEEK_END)
+        print(f"{Colors.CYAN}⏬ Last {len(lines)} lines{Colors.RESET}\n")
+        for line in lines: self.print_log_line(line)
+        width = len('\n'.encode(encoding)) if encoding.startswith(WIDE_ENCODINGS) else 1
+        if self.follow: self.follow_log(filepath, offset - offset % width, encoding)
+    def print_log_line(self, line):
+        if len(line) > self.max_width: line = line[:self.max_width] + f"{Colors.GRAY}...{Colors.RESET}"
+        print(self.colorize_log(line), flush=True)
+    def follow_log(self, filepath, offset, encoding='utf-8', interval=0.5, block=1 << 20):
+        print(f"{Colors.GRAY}👀 Following {filepath} (Ctrl+C to stop){Colors.RESET}", flush=True)
+        f,pending,decoder = open(filepath, 'rb'),'',codecs.getincrementaldecoder(encoding)('ignore')
+        try:
+            while True:
+                try: stat = os.stat(filepath)
+                except FileNotFoundError: time.sleep(interval); continue
+                if stat.st_ino != os.fstat(f.fileno()).st_ino or stat.st_size < offset:
+                    print(f"{Colors.YELLOW}⚠️  File rotated or truncated - following from the start{Colors.RESET}", flush=True)
+                    f.close()
+                    f,offset,pending = open(filepath, 'rb'),0,''
+                    decoder.reset()
+                if stat.st_size <= offset: time.sleep(interval); continue
+                f.seek(offset)
+                data = f.read(min(block, stat.st_size - offset))
+                offset += len(data)
+                lines = (pending + decoder.decode(data)).split('\n')
+                pending = lines.pop()
+                for line in lines: self.print_log_line(line.rstrip('\r'))
+        finally: f.close()
+    def show_log_index(self, index):
+        data,severity = index.data,index.data['severity']
+        print(f"{Colors.CYAN}🗂️  Log index: {data['lines']:,} lines | {len(data['checkpoints'])} checkpoints | {data['first'] or '?'} → {data['last'] or '?'}{Colors.RESET}")
+        print(f"{Colors.RED}{severity.get('error', 0):,} errors{Colors.RESET} | {Colors.YELLOW}{severity.get('warn', 0):,} warnings{Colors.RESET} | {Colors.GREEN}{severity.get('info', 0):,} info{Colors.RESET} | {Colors.GRAY}{severity.get('debug', 0):,} debug | {index.path}{Colors.RESET}\n")
     def preview_image(self, filepath):
         try:
             from PIL import Image
@@ -117,15 +983,134 @@ class FilePreview:
         except Exception as e: print(f"{Colors.RED}Error reading image: {e}{Colors.RESET}")
     def preview_binary(self, filepath):
         try:
-            with open(filepath, 'rb') as f: data = f.read(256)
-            print(f"{Colors.MAGENTA}🔧 Binary Preview (first 256 bytes){Colors.RESET}")
-            hex_dump = ' '.join(f'{b:02x}' for b in data)
-            for i in range(0, len(hex_dump), 48):
-                chunk,ascii_part = hex_dump[i:i+48],''.join(chr(b) if 32 <= b < 127 else '.' for b in data[i//3:(i//3)+16])
-                print(f"{Colors.GRAY}{i//3:08x}{Colors.RESET}  {chunk:<48} {Colors.CYAN}|{ascii_part}|{Colors.RESET}")
+            with open(filepath, 'rb') as f, map_file(f) as data:
+                size = len(data)
+                offset = max(0, min(self.binary_offset if self.binary_offset >= 0 else size + self.binary_offset, size))
+                scan_end = min(offset + self.binary_length, size) if self.binary_length else size
+                end = min(offset + self.dump_length(), scan_end)
+                print(f"{Colors.MAGENTA}🔧 Binary Preview (bytes {offset:#x}-{end:#x} of {size:,}){Colors.RESET}")
+                self.print_hex(data, offset, end)
+                if end < scan_end and self.binary_length: print(f"{Colors.YELLOW}... {scan_end - end:,} more bytes in range (raise -n to dump more){Colors.RESET}")
+                if self.metrics: self.metrics.count('bytes_read', scan_end - offset if self.show_entropy or self.strings_min else end - offset)
+                if self.show_entropy: self.show_entropy_map(data, offset, scan_end)
+                if self.strings_min: self.show_strings(data, offset, scan_end)
         except Exception as e: print(f"{Colors.RED}Error reading binary file: {e}{Colors.RESET}")
-    def preview_text(self, content): self.print_lines(content.split('\n'))
-    def preview_code(self, content, lang):
+    def dump_length(self):
+        # --length bounds the entropy/strings scan; the hex dump stays within -n rows of 16 bytes
+        return min(self.binary_length or 256, self.max_lines * 16)
+    def print_hex(self, data, start, end):
+        for row in range(start, end, 16):
+            chunk = data[row:min(row + 16, end)]
+            hex_part,ascii_part = ' '.join(f'{b:02x}' for b in chunk),''.join(chr(b) if 32 <= b < 127 else '.' for b in chunk)
+            print(f"{Colors.GRAY}{row:08x}{Colors.RESET}  {hex_part:<48} {Colors.CYAN}|{ascii_part}|{Colors.RESET}")
+    def preview_compressed(self, filepath, file_type):
+        import tarfile,zipfile
+        root,ext = os.path.splitext(filepath)
+        size,inflated = os.path.getsize(filepath),None
+        if file_type == 'gzip' and size >= 18:
+            # ISIZE trailer: uncompressed length of the last member modulo 2**32
+            with open(filepath, 'rb') as f: f.seek(-4, os.SEEK_END); inflated = int.from_bytes(f.read(4), 'little')
+        ratio = f" | ~{self.format_size(inflated)} inflated ({inflated / size:.1f}x)" if inflated else ''
+        print(f"{Colors.MAGENTA}🗜️  {file_type.upper()} stream{ratio} - decompressing only what is shown{Colors.RESET}")
+        if self.follow or self.since or self.until or self.build_index: print(f"{Colors.YELLOW}⚠️  --follow/--since/--until/--index need an uncompressed log - ignored here{Colors.RESET}")
+        try:
+            with optional_import(DECOMPRESSORS[file_type]).open(filepath, 'rb') as f: self.preview_member(f, root + COMPRESSED_SUFFIXES.get(ext.lower(), ''))
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as e: print(f"{Colors.RED}❌ Decompression failed: {str(e)[:60]}{Colors.RESET}")
+    def preview_member(self, f, name):
+        import tarfile,zipfile
+        file_type,encoding = self.sniff_header(f.peek(512)[:512], name)
+        print(f"{Colors.GRAY}Contents: {file_type.upper()} ({os.path.basename(name)}){Colors.RESET}\n")
+        if file_type == 'tar': return self.preview_tar(tarfile.open(fileobj=f, mode='r|'), seekable=False)
+        if file_type == 'zip': return self.preview_zip(zipfile.ZipFile(io.BytesIO(f.read())))
+        if file_type in DECOMPRESSORS:
+            root,ext = os.path.splitext(name)
+            with optional_import(DECOMPRESSORS[file_type]).open(f, 'rb') as inner: return self.preview_member(inner, root + COMPRESSED_SUFFIXES.get(ext.lower(), ''))
+        if self.is_binary(file_type):
+            data = f.read(self.dump_length())
+            return self.print_hex(data, 0, len(data))
+        encoding,reader = encoding or 'utf-8',LineReader(f, encoding or 'utf-8')
+        if self.tail is not None: return self.tail_member(reader)
+        def text(newline=None): return io.TextIOWrapper(io.BufferedReader(StreamReader(f)), encoding=encoding, errors='ignore', newline=newline)
+        if file_type in ['csv', 'tsv']: self.render_csv(text(''), file_type)
+        elif file_type == 'json': self.preview_json(text())
+        elif file_type == 'ndjson': self.preview_ndjson(text())
+        elif file_type == 'log': self.preview_log(reader)
+        elif file_type in ['python', 'javascript', 'shell']: self.preview_code(reader, file_type)
+        else: self.preview_text(reader)
+        if reader.consumed and not f.closed and f.peek(1): print(f"{Colors.YELLOW}... more lines (not decompressed){Colors.RESET}")
+    def preview_archive(self, filepath, file_type):
+        import tarfile,zipfile
+        try:
+            if file_type == 'zip':
+                with zipfile.ZipFile(filepath) as archive: return self.preview_zip(archive)
+            with tarfile.open(filepath, 'r:') as archive: self.preview_tar(archive, seekable=True)
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as e: print(f"{Colors.RED}❌ Archive error: {str(e)[:60]}{Colors.RESET}")
+    def tail_member(self, reader):
+        # No seeking back from the end of a compressed stream: inflate it once, keeping only the last lines
+        lines = deque(reader, maxlen=self.tail)
+        print(f"{Colors.CYAN}⏬ Last {len(lines)} lines (of {reader.consumed:,}, decompressed in full){Colors.RESET}\n")
+        for line in lines: self.print_log_line(line)
+    def preview_zip(self, archive):
+        if self.member:
+            try: info = archive.getinfo(self.member)
+            except KeyError: return print(f"{Colors.RED}❌ Member not found: {self.member}{Colors.RESET}")
+            print(f"{Colors.CYAN}📦 {info.filename} ({self.format_size(info.file_size)}){Colors.RESET}")
+            with archive.open(info) as f: return self.preview_member(f, info.filename)
+        self.list_members(((info.filename, info.file_size, info.compress_size, datetime(*info.date_time)) for info in archive.infolist() if not info.is_dir()), True)
+    def preview_tar(self, archive, seekable):
+        members = (member for member in archive if member.isfile())
+        if self.member:
+            for member in members:
+                if member.name == self.member:
+                    print(f"{Colors.CYAN}📦 {member.name} ({self.format_size(member.size)}){Colors.RESET}")
+                    return self.preview_member(archive.extractfile(member), member.name)
+            return print(f"{Colors.RED}❌ Member not found: {self.member}{Colors.RESET}")
+        # Listing a compressed tar inflates it, so stop at max_lines unless headers can be skipped with seeks
+        self.list_members(((member.name, member.size, None, datetime.fromtimestamp(member.mtime)) for member in members), seekable)
+    def list_members(self, members, complete):
+        print(f"{Colors.BOLD}{'size':>10} {'packed':>10} {'ratio':>6}  {'modified':16}  name{Colors.RESET}")
+        count,size,packed,stopped = 0,0,0,False
+        for name, length, stored, modified in members:
+            if count >= self.max_lines and not complete:
+                stopped = True
+                print(f"{Colors.YELLOW}... more members (listing stopped to avoid decompressing the archive){Colors.RESET}")
+                break
+            count,size,packed = count + 1,size + length,packed + (stored or 0)
+            if count > self.max_lines: continue
+            ratio = f"{stored / length:>6.0%}" if stored is not None and length else f"{'-':>6}"
+            print(f"{self.format_size(length):>10} {self.format_size(stored) if stored is not None else '-':>10} {ratio}  {modified:%Y-%m-%d %H:%M}  {Colors.GREEN}{name}{Colors.RESET}")
+        if count > self.max_lines: print(f"{Colors.YELLOW}... {count - self.max_lines:,} more members{Colors.RESET}")
+        print(f"\n{Colors.CYAN}📦 {'first ' if stopped else ''}{count:,} members | {self.format_size(size)} uncompressed{f' | {self.format_size(packed)} packed ({packed / size:.0%})' if packed and size else ''}{Colors.RESET}")
+    def byte_histogram(self, data, start, end):
+        np = optional_import('numpy')
+        if np is not None: return np.bincount(np.frombuffer(data, np.uint8, count=end - start, offset=start), minlength=256)
+        counts = Counter()
+        for pos in range(start, end, 1 << 20): counts.update(data[pos:min(pos + (1 << 20), end)])
+        return list(counts.values())
+    def entropy(self, counts, total):
+        np = optional_import('numpy')
+        if np is not None:
+            p = counts[counts > 0] / total
+            return float(-(p * np.log2(p)).sum())
+        return -sum(c / total * math.log2(c / total) for c in counts if c)
+    def show_entropy_map(self, data, start, end, blocks=64):
+        if end <= start: return
+        step = max(4096, -(-(end - start) // blocks))
+        values = [self.entropy(self.byte_histogram(data, pos, min(pos + step, end)), min(pos + step, end) - pos) for pos in range(start, end, step)]
+        bars,overall = ' ▁▂▃▄▅▆▇█',sum(values) / len(values)
+        hint = 'compressed/encrypted' if overall > 7.5 else 'sparse/padding' if overall < 1 else 'mixed content'
+        print(f"\n{Colors.MAGENTA}📈 Entropy ({len(values)} blocks of {self.format_size(min(step, end - start))}, avg {overall:.2f} bits/byte - {hint}){Colors.RESET}")
+        print(f"{Colors.GRAY}{start:08x}{Colors.RESET} {Colors.CYAN}{''.join(bars[min(8, int(v + 0.5))] for v in values)}{Colors.RESET} {Colors.GRAY}{end:08x}{Colors.RESET}")
+    def show_strings(self, data, start, end):
+        print(f"\n{Colors.MAGENTA}🔤 Printable strings (min {self.strings_min} chars){Colors.RESET}")
+        pattern,shown = re.compile(rb'[\x20-\x7e]{%d,}' % self.strings_min),0
+        for match in pattern.finditer(data, start, end):
+            if shown == self.max_lines: return print(f"{Colors.YELLOW}... more strings (stopped after {self.max_lines}){Colors.RESET}")
+            text = match.group().decode('ascii')
+            print(f"{Colors.GRAY}{match.start():08x}{Colors.RESET}  {text[:self.max_width]}{f'{Colors.GRAY}...{Colors.RESET}' if len(text) > self.max_width else ''}")
+            shown += 1
+    def preview_text(self, content, remaining=None): self.print_lines(self.split_lines(content), remaining=remaining)
+    def preview_code(self, content, lang, remaining=None):
         keywords = {'python': ['def', 'class', 'import', 'from', 'if', 'for', 'while', 'try', 'except'],'javascript': ['function', 'const', 'let', 'var', 'if', 'for', 'while', 'try', 'catch'],'shell': ['#!/bin/bash', 'function', 'if', 'for', 'while', 'case', 'echo']}
         def colorize(line):
             colored = line
@@ -134,40 +1119,67 @@ class FilePreview:
             if line.strip().startswith('#'): return f"{Colors.GREEN}{line}{Colors.RESET}"
             elif line.strip().startswith(('function', 'def ', 'class ')): return f"{Colors.MAGENTA}{line}{Colors.RESET}"
             return colored
-        self.print_lines(content.split('\n'), colorize)
-    def analyze_file_comprehensive(self, filepath, content, file_type):
-        path = Path(filepath)
-        stat = path.stat()
-        lines = content.count('\n') + 1 if content else 0
-        words = len(content.split()) if content else 0
-        stats = {'lines': lines, 'words': words, 'chars': len(content), 'size': stat.st_size, 'perms': oct(stat.st_mode)[-3:]}
-        code_stats = {}
-        if file_type in ['python', 'javascript', 'shell']:
-            functions = len(re.findall(r'^\s*(def |function |function\s)', content, re.MULTILINE))
-            classes = len(re.findall(r'^\s*class\s', content, re.MULTILINE))
-            comments = len(re.findall(r'^\s*#', content, re.MULTILINE))
-            imports = len(re.findall(r'^\s*(import |from )', content, re.MULTILINE))
-            code_stats = {'functions': functions, 'classes': classes, 'comments': comments, 'imports': imports}
-        patterns = {}
-        urls = re.findall(r'https?://[^\s<>"\']+', content)
-        emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', content)
-        ips = re.findall(r'\b(?:\d{1,3}\.){3}\d{1,3}\b', content)
-        if urls: patterns['urls'] = len(urls)
-        if emails: patterns['emails'] = len(emails)
-        if ips: patterns['ips'] = len(ips)
+        self.print_lines(self.split_lines(content), colorize, remaining)
+    def preview_stream(self, filepath, file_type, size):
+        print(f"{Colors.GRAY}📡 Streaming preview ({self.format_size(size)}) - only context plugins run{Colors.RESET}\n")
+        encoding = self.context.encoding if self.context else 'utf-8'
+        with self.stage('render'), self.open_binary(filepath) as f:
+            reader = LineReader(f, encoding)
+            if file_type in ['csv', 'tsv']: self.preview_csv(filepath, file_type)
+            elif file_type == 'json': self.preview_json(io.TextIOWrapper(f, encoding=encoding, errors='ignore'))
+            elif file_type == 'ndjson': self.preview_ndjson(io.TextIOWrapper(f, encoding=encoding, errors='ignore'), self.count_file_lines(filepath))
+            elif file_type == 'log': self.preview_log(reader, reader.remaining)
+            elif file_type in ['python', 'javascript', 'shell']: self.preview_code(reader, file_type, reader.remaining)
+            else: self.preview_text(reader, reader.remaining)
+        if self.context:
+            with self.stage('plugins'): self.plugins.process_file(self.context)
+        with self.stage('analysis'): analysis = self.stream_analysis(filepath, file_type, encoding)
+        with self.stage('summary'): self.show_comprehensive_analysis(filepath, None, file_type, analysis)
+        if self.use_ai:
+            with self.stage('ai'): self.ai_analyze_content(None, file_type, filepath)
+    def stream_analysis(self, filepath, file_type, encoding):
+        # Rendered before this runs; a full pass over a large file would dwarf the preview, so sample its head unless asked or already known
+        if self.full_analysis or (self.context and 'analysis' in self.context.memos): return self.context.analysis if self.context else self.cached_analysis(filepath, None, file_type, encoding)
+        entry = self.cache.get(filepath) if self.cache else {}
+        if 'analysis' in entry: return Analysis._make(entry['analysis'])
+        return self.analyze_file_comprehensive(filepath, None, file_type, encoding, self.analysis_sample)
+    def analyze_file_comprehensive(self, filepath, content=None, file_type='text', encoding='utf-8', limit=None):
+        stat = Path(filepath).stat()
+        counts,lines,words,chars,urls,sampled = Counter(),0,0,0,[],False
+        is_code = file_type in ['python', 'javascript', 'shell']
+        # Newline-aligned byte chunks only work for ASCII-compatible encodings
+        if encoding.startswith(WIDE_ENCODINGS) and not isinstance(content, str):
+            if content is None:
+                with open(filepath, 'rb') as f: content = f.read(-1 if limit is None else limit)
+            content = content[:limit].decode(encoding, 'ignore')
+        with open(filepath, 'rb') if content is None else nullcontext(content) as source:
+            for chunk in iter_chunks(source, 1 << 20 if limit is None else min(limit, 1 << 20), encoding):
+                if limit is not None and chars >= limit: sampled = True; break
+                lines,words,chars = lines + chunk.count('\n'),words + len(chunk.split()),chars + len(chunk)
+                if is_code: counts.update(match.lastgroup for match in CODE_PATTERN.finditer(chunk))
+                for name, pattern in DATA_PATTERNS.items():
+                    if name == 'emails' and '@' not in chunk: continue
+                    found = pattern.findall(chunk)
+                    counts[name] += len(found)
+                    if name == 'urls' and len(urls) < 10: urls.extend(found[:10 - len(urls)])
+                counts['sensitive_content'] += len(SENSITIVE_PATTERN.findall(chunk.lower()))
+        stats = {'lines': lines + 1 if chars else 0, 'words': words, 'chars': chars, 'size': stat.st_size, 'perms': oct(stat.st_mode)[-3:], **({'sampled': True} if sampled else {})}
+        code_stats = {name: counts[name] for name in ['functions', 'classes', 'comments', 'imports']} if is_code else {}
+        patterns = {name: counts[name] for name in ['urls', 'emails', 'ips'] if counts[name]}
+        security = self.permission_flags(stat.st_mode)
+        if counts['sensitive_content']: security['sensitive_content'] = counts['sensitive_content']
+        return Analysis(stats, code_stats, patterns, security, urls)
+    def permission_flags(self, mode):
         security = {}
-        mode = stat.st_mode
         if mode & 0o002: security['world_writable'] = True
         if mode & 0o004: security['world_readable'] = True
         if mode & 0o001: security['world_executable'] = True
-        sensitive_patterns = ['password', 'secret', 'key', 'token', 'api', 'auth']
-        sensitive_lines = [i+1 for i, line in enumerate(content.lower().split('\n')) if any(pattern in line for pattern in sensitive_patterns)]
-        if sensitive_lines: security['sensitive_content'] = len(sensitive_lines)
-        return stats, code_stats, patterns, security
-    def show_comprehensive_analysis(self, filepath, content, file_type):
-        stats, code_stats, patterns, security = self.analyze_file_comprehensive(filepath, content, file_type)
+        return security
+    def show_comprehensive_analysis(self, filepath, content, file_type, analysis=None):
+        stats, code_stats, patterns, security, _ = analysis or self.analyze_file_comprehensive(filepath, content, file_type)
         print(f"\n{Colors.CYAN}📊 Comprehensive Analysis{Colors.RESET}")
         print(f"File: {stats['lines']:,} lines | {stats['words']:,} words | {stats['chars']:,} chars | {self.format_size(stats['size'])}")
+        if stats.get('sampled'): print(f"{Colors.GRAY}Counts cover the first {stats['chars']:,} chars only (--full-analysis scans the whole file){Colors.RESET}")
         if code_stats:
             print(f"Code: {code_stats.get('functions', 0)} functions | {code_stats.get('classes', 0)} classes | {code_stats.get('comments', 0)} comments | {code_stats.get('imports', 0)} imports")
         if patterns:
@@ -180,76 +1192,324 @@ class FilePreview:
             if security.get('world_executable'): security_items.append('world-executable')
             if security.get('sensitive_content'): security_items.append(f"{security['sensitive_content']} sensitive lines")
             if security_items: print(f"{Colors.YELLOW}Security: {' | '.join(security_items)}{Colors.RESET}")
+    def ai_pipeline(self):
+        self.ai.cache,self.ai.concurrency,self.ai.max_chunks = self.cache,self.ai_concurrency,self.ai_chunks
+        return self.ai
     def ai_analyze_content(self, content, file_type, filepath):
-        if not self.use_ai or not self.openai: return
-        try:
-            prompts = {'python':'Analyze this Python code structure','javascript':'Analyze this JavaScript functionality','shell':'Analyze this shell script','html':'Analyze this HTML structure','css':'Analyze this CSS styling','sql':'Analyze this SQL query','json':'Analyze this JSON data','csv':'Analyze this CSV dataset','log':'Analyze this log file for events and issues'}
-            response = self.openai.chat.completions.create(model="gpt-4o-mini",messages=[{"role": "user", "content": f"{prompts.get(file_type, f'Summarize this {file_type} file')}:\n\n{content[:2000]}"}],max_tokens=300)
-            analysis = response.choices[0].message.content
-            print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*50}\n{Colors.MAGENTA}🤖 AI INSIGHTS: {file_type.upper()} ANALYSIS\n{'='*50}{Colors.RESET}")
-            for line in analysis.split('\n'):
-                if line.strip():
-                    if line.startswith('#') or '**' in line or line.startswith('###'): print(f"{Colors.BOLD}{Colors.GREEN}{line}{Colors.RESET}")
-                    elif any(word in line.lower() for word in ['error', 'issue', 'problem', 'warning', 'bug']): print(f"{Colors.YELLOW}{line}{Colors.RESET}")
-                    elif any(word in line.lower() for word in ['key', 'important', 'critical', 'main', 'purpose']): print(f"{Colors.CYAN}{line}{Colors.RESET}")
-                    else: print(f"{Colors.RESET}{line}")
-            print(f"{Colors.BOLD}{Colors.BLUE}{'='*50}{Colors.RESET}\n")
-        except Exception as e:
-            error_msg = str(e)
-            if "429" in error_msg: print(f"{Colors.YELLOW}⚠️  AI rate limit Exceeded{Colors.RESET}")
-            elif "401" in error_msg: print(f"{Colors.RED}⚠️  Invalid API key{Colors.RESET}")
-            elif "network" in error_msg.lower(): print(f"{Colors.YELLOW}⚠️  Network error{Colors.RESET}")
-            else: print(f"{Colors.YELLOW}⚠️  AI unavailable: {error_msg[:40]}...{Colors.RESET}")
+        if not self.use_ai or not self.ai: return
+        try:
+            pipeline = self.ai_pipeline()
+            self.print_ai_report(pipeline.run(lambda: pipeline.analyze(content if content is not None else Path(filepath), file_type, self.context.encoding if self.context else 'utf-8')), file_type)
+        except Exception as e: self.print_ai_error(e)
+    def print_ai_report(self, analysis, file_type, title=None):
+        print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*50}\n{Colors.MAGENTA}🤖 AI INSIGHTS: {title or file_type.upper() + ' ANALYSIS'}\n{'='*50}{Colors.RESET}")
+        for line in analysis.split('\n'):
+            if line.strip():
+                if line.startswith('#') or '**' in line or line.startswith('###'): print(f"{Colors.BOLD}{Colors.GREEN}{line}{Colors.RESET}")
+                elif any(word in line.lower() for word in ['error', 'issue', 'problem', 'warning', 'bug']): print(f"{Colors.YELLOW}{line}{Colors.RESET}")
+                elif any(word in line.lower() for word in ['key', 'important', 'critical', 'main', 'purpose']): print(f"{Colors.CYAN}{line}{Colors.RESET}")
+                else: print(f"{Colors.RESET}{line}")
+        print(f"{Colors.BOLD}{Colors.BLUE}{'='*50}{Colors.RESET}\n")
+    def print_ai_error(self, e):
+        error_msg = str(e)
+        if "429" in error_msg: print(f"{Colors.YELLOW}⚠️  AI rate limit Exceeded{Colors.RESET}")
+        elif "401" in error_msg: print(f"{Colors.RED}⚠️  Invalid API key{Colors.RESET}")
+        elif "network" in error_msg.lower(): print(f"{Colors.YELLOW}⚠️  Network error{Colors.RESET}")
+        else: print(f"{Colors.YELLOW}⚠️  AI unavailable: {error_msg[:40]}...{Colors.RESET}")
+    def scan_ai(self, results):
+        items = [(Path(filepath), file_type, self.sniff(filepath).encoding or 'utf-8') for filepath, file_type in results if not self.is_binary(file_type)]
+        if not items: return
+        pipeline = self.ai_pipeline()
+        reports = pipeline.run(lambda: pipeline.analyze_many(items))
+        for (filepath, file_type, _), report in zip(items, reports):
+            if isinstance(report, Exception): print(f"{Colors.GRAY}{filepath}:{Colors.RESET}", end=' '); self.print_ai_error(report)
+            else: self.print_ai_report(report, file_type, filepath)
+        print(f"{Colors.GRAY}🤖 {pipeline.calls} AI requests for {len(items)} files ({pipeline.cached_hits} served from cache){Colors.RESET}")
     def preview_file(self, filepath):
         try:
             if not os.path.exists(filepath): return print(f"{Colors.RED}❌ File not found: {filepath}{Colors.RESET}")
             if not os.access(filepath, os.R_OK): return print(f"{Colors.RED}❌ Permission denied: {filepath}{Colors.RESET}")
-            file_type,size = self.detect_type(filepath),os.path.getsize(filepath)
-            self.print_header(filepath, file_type, size)
-            plugin_handler = self.plugins.get_handler(file_type)
-            if plugin_handler:
-                try: return plugin_handler(filepath, self)
-                except Exception as e: print(f"{Colors.YELLOW}⚠️ Plugin failed, using default: {e}{Colors.RESET}")
-            if file_type in ['png', 'jpeg', 'gif']: return self.preview_image(filepath)
-            elif file_type == 'binary': return self.preview_binary(filepath)
-            elif size > 10 * 1024 * 1024: return print(f"{Colors.YELLOW}⚠️  File too large for preview (>10MB){Colors.RESET}")
+            with self.stage('detect'): (file_type, encoding),size = self.cached(filepath, 'detection', lambda: self.sniff(filepath), Detection._make),os.path.getsize(filepath)
+            if self.metrics: self.metrics.count('files')
+            self.print_header(filepath, file_type, size, encoding)
+            self.context = FileContext(filepath, file_type, self, encoding or 'utf-8')
             try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f: content = f.read()
-                if not content.strip(): return print(f"{Colors.GRAY}📭 File is empty{Colors.RESET}")
-                self.plugins.process_file(filepath, content, file_type)
+                with self.stage('total'): return self.dispatch(filepath, file_type, size)
+            finally: self.context.close(); self.context = None
+        except Exception as e: print(f"{Colors.RED}❌ Unexpected error: {str(e)[:60]}{Colors.RESET}")
+    def dispatch(self, filepath, file_type, size):
+        ctx = self.context
+        plugin_handler = self.plugins.get_handler(file_type)
+        if plugin_handler:
+            try: return plugin_handler(filepath, self)
+            except Exception as e: print(f"{Colors.YELLOW}⚠️ Plugin failed, using default: {e}{Colors.RESET}")
+        if not self.is_binary(file_type) and (self.tail is not None or self.follow or self.since or self.until or self.build_index): return self.preview_log_slice(filepath)
+        if file_type in ['png', 'jpeg', 'gif']: return self.preview_image(filepath)
+        elif file_type in DECOMPRESSORS: return self.preview_compressed(filepath, file_type)
+        elif file_type in ['zip', 'tar']: return self.preview_archive(filepath, file_type)
+        elif self.is_binary(file_type): return self.preview_binary(filepath)
+        elif size > self.stream_threshold: return self.preview_stream(filepath, file_type, size)
+        try:
+            with self.stage('read'): content = ctx.text
+            if not content.strip(): return print(f"{Colors.GRAY}📭 File is empty{Colors.RESET}")
+            with self.stage('analysis'): analysis = ctx.analysis
+            with self.stage('plugins'): self.plugins.process_file(ctx)
+            with self.stage('render'):
                 if file_type == 'json': self.preview_json(content)
-                elif file_type in ['csv', 'tsv']: self.preview_csv(filepath)
+                elif file_type == 'ndjson': self.preview_ndjson(content, content.count('\n') + (not content.endswith('\n')))
+                elif file_type in ['csv', 'tsv']: self.preview_csv(filepath, file_type)
                 elif file_type == 'log': self.preview_log(content)
                 elif file_type in ['python', 'javascript', 'shell']: self.preview_code(content, file_type)
                 else: self.preview_text(content)
-                self.show_comprehensive_analysis(filepath, content, file_type)
-                if self.use_ai and content.strip(): self.ai_analyze_content(content, file_type, filepath)
-            except UnicodeDecodeError: print(f"{Colors.YELLOW}⚠️  Non-text data - showing as binary{Colors.RESET}"); self.preview_binary(filepath)
-            except MemoryError: print(f"{Colors.RED}❌ File too large for memory{Colors.RESET}")
-            except Exception as e: print(f"{Colors.RED}❌ Error reading: {str(e)[:60]}{Colors.RESET}")
-        except Exception as e: print(f"{Colors.RED}❌ Unexpected error: {str(e)[:60]}{Colors.RESET}")
+            with self.stage('summary'): self.show_comprehensive_analysis(filepath, content, file_type, analysis)
+            if self.use_ai and content.strip():
+                with self.stage('ai'): self.ai_analyze_content(content, file_type, filepath)
+        except UnicodeDecodeError: print(f"{Colors.YELLOW}⚠️  Non-text data - showing as binary{Colors.RESET}"); self.preview_binary(filepath)
+        except MemoryError: print(f"{Colors.RED}❌ File too large for memory{Colors.RESET}")
+        except Exception as e: print(f"{Colors.RED}❌ Error reading: {str(e)[:60]}{Colors.RESET}")
+
+    def scan_paths(self, paths, recursive=False, workers=None):
+        files = [f for path in paths for f in (walk_files(path, recursive) if os.path.isdir(path) else [path])]
+        print(f"{Colors.BOLD}{Colors.CYAN}🔎 Scanning {len(files):,} files with {workers or os.cpu_count()} workers{Colors.RESET}\n")
+        types,totals,writable,errors,scanned = Counter(),Counter(),[],0,[]
+        entries = [self.cache.get(f) if self.cache else {} for f in files]
+        hits = [(f, entry['type'], Analysis._make(entry['analysis']), None, None) if 'type' in entry and 'analysis' in entry else None for f, entry in zip(files, entries)]
+        misses = [f for f, hit in zip(files, hits) if not hit]
+        if workers == 1 or not misses: scan_init(self.plugins.signatures)
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        context = multiprocessing.get_context(self.start_method) if self.start_method else None
+        with (ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=scan_init, initargs=(self.plugins.signatures,)) if workers != 1 and misses else nullcontext()) as pool:
+            fresh = pool.map(scan_file, misses, chunksize=max(1, min(64, len(misses) // (4 * (workers or os.cpu_count() or 1))))) if pool else map(scan_file, misses)
+            for hit in hits:
+                filepath, file_type, analysis, error, timing = hit or next(fresh)
+                if not (hit or error) and self.cache: self.cache.update(filepath, type=file_type, analysis=analysis)
+                if self.metrics:
+                    self.metrics.count('files')
+                    if hit: self.metrics.count('cache_hits')
+                    elif error: self.metrics.count('errors')
+                    else: self.metrics.count('bytes_read', analysis.stats['size'])
+                    if timing: self.metrics.record('scan', *timing); self.metrics.record(f'scan:{file_type or "error"}', *timing)
+                if error:
+                    errors += 1
+                    print(f"{Colors.RED}❌ {filepath}: {error}{Colors.RESET}"); continue
+                stats,security = analysis.stats,analysis.security
+                types[file_type] += 1
+                scanned.append((filepath, file_type))
+                totals.update({'size': stats['size'], 'lines': stats['lines'], 'sensitive': security.get('sensitive_content', 0)})
+                if security.get('world_writable'): writable.append(filepath)
+                flags = ' '.join(flag for flag, hit in [('⚠️ writable', security.get('world_writable')), (f"🔑 {security.get('sensitive_content')} sensitive", security.get('sensitive_content'))] if hit)
+                print(f"{Colors.BLUE}{file_type.upper():10}{Colors.RESET} {self.format_size(stats['size']):>9} {stats['lines']:>9,} lines  {filepath} {Colors.YELLOW}{flags}{Colors.RESET}")
+        print(f"\n{Colors.BOLD}{Colors.CYAN}📦 Batch Summary{Colors.RESET}")
+        print(f"Files: {sum(types.values()):,} | Size: {self.format_size(totals['size'])} | Lines: {totals['lines']:,} | Errors: {errors}")
+        print(f"Types: {' | '.join(f'{count} {name}' for name, count in types.most_common())}")
+        if totals['sensitive']: print(f"{Colors.YELLOW}Sensitive lines: {totals['sensitive']:,}{Colors.RESET}")
+        if writable: print(f"{Colors.RED}World-writable ({len(writable)}): {', '.join(writable[:5])}{' ...' if len(writable) > 5 else ''}{Colors.RESET}")
+        if self.use_ai:
+            with self.stage('ai'): self.scan_ai(scanned)
+    def file_digest(self, filepath, limit=None):
+        try:
+            size = os.path.getsize(filepath)
+            if limit is None or size <= limit:
+                cached = self.cache.get(filepath).get('hashes', {}).get('sha256') if self.cache else None
+                if cached: return size, cached
+            digest = hash_digests(filepath, ('sha256',), limit=limit)['sha256']
+            if self.metrics: self.metrics.count('bytes_read', size if limit is None else min(size, limit))
+            if self.cache and (limit is None or size <= limit): self.cache.update(filepath, hashes={**(self.cache.get(filepath).get('hashes') or {}), 'sha256': digest})
+            return size, digest
+        except OSError as e: print(f"{Colors.RED}❌ {filepath}: {str(e)[:60]}{Colors.RESET}")
+    def dedupe_paths(self, paths, recursive=False, workers=None, partial=1 << 16):
+        files,sizes,inodes = [f for path in paths for f in (walk_files(path, recursive) if os.path.isdir(path) else [path])],defaultdict(list),set()
+        for filepath in files:
+            try: stat = os.stat(filepath)
+            except OSError: continue
+            if not stat.st_size or (stat.st_dev, stat.st_ino) in inodes: continue
+            inodes.add((stat.st_dev, stat.st_ino)); sizes[stat.st_size].append(filepath)
+        groups = [group for group in sizes.values() if len(group) > 1]
+        print(f"{Colors.BOLD}{Colors.CYAN}🧬 Checking {len(files):,} files for duplicates ({sum(map(len, groups)):,} share a size){Colors.RESET}\n")
+        def regroup(groups, key):
+            candidates,buckets = [f for group in groups for f in group],defaultdict(list)
+            for filepath, digest in zip(candidates, pool.map(key, candidates)):
+                if digest: buckets[digest].append(filepath)
+            return {digest: group for digest, group in buckets.items() if len(group) > 1}
+        from concurrent.futures import ThreadPoolExecutor
+        with self.stage('dedupe'), ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            # Files no larger than the prefix are already fully hashed; only larger prefix matches are read in full
+            prefixed = regroup(groups, lambda f: self.file_digest(f, partial))
+            large = [group for (size, _), group in prefixed.items() if size > partial]
+            groups = {**{key: group for key, group in prefixed.items() if key[0] <= partial}, **regroup(large, self.file_digest)}
+        reclaimable = sum(size * (len(group) - 1) for (size, _), group in groups.items())
+        for (size, digest), group in sorted(groups.items(), key=lambda item: -item[0][0] * (len(item[1]) - 1)):
+            print(f"{Colors.YELLOW}{len(group)} copies × {self.format_size(size)}{Colors.RESET} {Colors.GRAY}sha256:{digest}{Colors.RESET}")
+            for filepath in group: print(f"  {filepath}")
+        print(f"\n{Colors.BOLD}{Colors.CYAN}📦 Duplicate Summary{Colors.RESET}")
+        print(f"Groups: {len(groups):,} | Duplicate files: {sum(len(g) - 1 for g in groups.values()):,} | Reclaimable: {self.format_size(reclaimable)} | Fully read: {sum(map(len, large)):,} of {len(files):,} files")
+    def print_metrics(self):
+        summary = self.metrics.summary()
+        print(f"\n{Colors.BOLD}{Colors.CYAN}⏱️  Profile{Colors.RESET}")
+        print(f"{Colors.BOLD}{'stage':<22} {'count':>6} {'total':>10} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'cpu':>9}{Colors.RESET}")
+        for name, values in summary['stages'].items():
+            print(f"{Colors.GREEN}{name[:22]:<22}{Colors.RESET} {values['count']:>6} " + ' '.join(f"{values[key] * 1000:>{10 if key == 'total' else 9}.1f}" for key in ('total', 'p50', 'p90', 'p99', 'max', 'cpu')) + ' ms')
+        if summary['plugins']:
+            print(f"{Colors.BOLD}{'plugin':<22} {'count':>6} {'total':>10} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'errors':>9}{Colors.RESET}")
+            for name, values in summary['plugins'].items():
+                print(f"{Colors.MAGENTA}{name[:22]:<22}{Colors.RESET} {values['count']:>6} " + ' '.join(f"{values[key] * 1000:>{10 if key == 'total' else 9}.1f}" for key in ('total', 'p50', 'p90', 'p99', 'max')) + f" {Colors.RED if values['errors'] else ''}{values['errors']:>9}{Colors.RESET}")
+        counters = ' | '.join(f"{name.replace('_', ' ')}: {self.format_size(value) if name.startswith('bytes') else f'{value:,}'}" for name, value in summary['counters'].items())
+        memory = f"peak memory: {self.format_size(summary['peak_memory'])}" if summary['peak_memory'] is not None else ''
+        print(f"{Colors.GRAY}{' | '.join(part for part in (counters, memory) if part)}{Colors.RESET}")
+    def write_metrics(self, path, fmt='json'):
+        text = self.metrics.prometheus() if fmt == 'prometheus' else json.dumps(self.metrics.summary(), indent=2) + '\n'
+        if path == '-': return sys.stdout.write(text)
+        with open(path, 'w', encoding='utf-8') as f: f.write(text)
+
+class PreviewServer:
+    def __init__(self, path, parser, plugin_paths=None):
+        self.path,self.parser,self.plugin_paths,self.managers,self.cache,self.lock = path,parser,plugin_paths or [],{},None,threading.Lock()
+    def plugins(self, plugin_paths):
+        # Plugin files are executed once and reused until one of them changes on disk
+        key = tuple(plugin_paths or ())
+        stamps = tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in key)
+        with self.lock:
+            if key not in self.managers or self.managers[key][0] != stamps: self.managers[key] = stamps,load_plugins(key)
+            return self.managers[key][1]
+    def shared_cache(self):
+        with self.lock:
+            if not self.cache: self.cache = AnalysisCache()
+            return self.cache
+    def handle(self, conn):
+        code = 0
+        with conn, conn.makefile('rb') as reader, conn.makefile('w', encoding='utf-8', errors='replace') as out:
+            try:
+                request = json.loads(reader.readline())
+                with sys.stdout.route(out), sys.stderr.route(out):
+                    try:
+                        args = self.parser.parse_args(request['argv'])
+                        # Nothing tells a polling follow loop that the client went away, so it would run (and hold the file) forever
+                        if args.follow: print(f"{Colors.RED}❌ --follow is not served by the daemon; run preview.py directly{Colors.RESET}"); sys.exit(2)
+                        resolve = lambda path: os.path.normpath(os.path.join(request['cwd'], path))
+                        args.files,args.plugin = [resolve(path) for path in args.files],[resolve(path) for path in args.plugin or []] or self.plugin_paths
+                        if args.metrics_json and args.metrics_json != '-': args.metrics_json = resolve(args.metrics_json)
+                        # Forking this threaded process could copy a lock another request holds; start batch workers fresh
+                        run(args, self.parser, self.plugins(args.plugin), self.shared_cache, request.get('env', {}), start_method='spawn')
+                    except SystemExit as e: code = e.code if isinstance(e.code, int) else int(e.code is not None)
+                    except Exception as e: print(f"{Colors.RED}❌ Application error: {str(e)[:60]}{Colors.RESET}"); code = 1
+                out.write(f"\0{code}\n")
+            except (OSError, ValueError, KeyError): pass
+    def serve(self):
+        import socket
+        if not hasattr(socket, 'AF_UNIX'): return print(f"{Colors.RED}❌ Unix sockets are not available on this platform{Colors.RESET}")
+        sys.stdout,sys.stderr = OutputRouter(sys.stdout),OutputRouter(sys.stderr)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, 0o700, exist_ok=True)
+        # Someone else's directory (e.g. a pre-created /tmp/raptors-<uid>) could swap the socket under our clients
+        if os.stat(directory).st_uid not in (os.getuid(), 0): return print(f"{Colors.RED}❌ Refusing to serve from {directory}: owned by another user{Colors.RESET}")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if os.path.exists(self.path): os.unlink(self.path)
+        # Bind under a private umask so the socket is never connectable by others, not even between bind and chmod
+        umask = os.umask(0o077)
+        try: server.bind(self.path)
+        finally: os.umask(umask)
+        server.listen(64)
+        self.plugins(self.plugin_paths)
+        print(f"{Colors.GREEN}🛰️  Serving previews on {self.path} (Ctrl+C to stop){Colors.RESET}")
+        try:
+            while True:
+                conn,_ = server.accept()
+                threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+        finally:
+            server.close()
+            if os.path.exists(self.path): os.unlink(self.path)
+            if self.cache: self.cache.close()
+
+def default_socket():
+    if os.environ.get('RAPTORS_SOCKET'): return os.environ['RAPTORS_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'): return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'raptors.sock')
+    # No per-user runtime dir: use a 0700 directory in the temp dir, created by the server
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), f"raptors-{os.getuid() if hasattr(os, 'getuid') else 'user'}", 'raptors.sock')
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='🔍 Smart File Preview Tool with Plugin Support')
+    parser.add_argument('files', nargs='*', metavar='file', help='File(s) to preview; several files or a directory switch to batch scan mode')
+    parser.add_argument('-r', '--recursive', action='store_true', help='Walk directories recursively in batch mode')
+    parser.add_argument('--dedupe', action='store_true', help='Find duplicate files by size, then a 64KB prefix hash, then a full SHA-256')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Batch worker processes (default: CPU count, 1 = in-process)')
+    parser.add_argument('-n', '--lines', type=int, default=50, help='Max lines (default: 50)')
+    parser.add_argument('-w', '--width', type=int, default=120, help='Max width (default: 120)')
+    parser.add_argument('--offset', type=lambda value: int(value, 0), default=0, help='Binary: start offset, hex ok, negative counts from EOF')
+    parser.add_argument('--length', type=lambda value: int(value, 0), default=None, help='Binary: bytes to scan and dump, the dump capped at --lines rows of 16 (default: 256 dumped, rest of file scanned)')
+    parser.add_argument('--entropy', action='store_true', help='Binary: show a block entropy map')
+    parser.add_argument('--strings', type=int, nargs='?', const=4, default=0, metavar='MIN', help='Binary: extract printable strings (default min length: 4)')
+    parser.add_argument('--member', metavar='NAME', help='Zip/tar: preview this archive member instead of listing members')
+    parser.add_argument('--csv-profile', choices=['head', 'reservoir', 'full'], default='head', help='CSV/TSV: profile the first rows, a reservoir sample of all rows, or every row (default: head)')
+    parser.add_argument('--sample', type=int, default=1000, help='CSV/TSV/NDJSON: rows or records to sample for profiles (default: 1000)')
+    parser.add_argument('--structure', action='store_true', help='JSON: summarize top-level keys, array lengths and depth in one streaming pass')
+    parser.add_argument('--tail', type=int, default=None, metavar='N', help='Show the last N lines (seeks back from EOF)')
+    parser.add_argument('-f', '--follow', action='store_true', help='Keep printing lines appended to the file')
+    parser.add_argument('--index', action='store_true', help='Build/update the log index as a <log>.rpidx sidecar and show its summary')
+    parser.add_argument('--since', help='Log: show lines from this timestamp (YYYY-MM-DD[ HH:MM:SS]), uses the log index')
+    parser.add_argument('--until', help='Log: show lines up to this timestamp, uses the log index')
+    parser.add_argument('--full-analysis', action='store_true', help='Streamed files: count lines, patterns and secrets over the whole file (default: first 4MB)')
+    parser.add_argument('--ai', action='store_true', help='Enable AI analysis (requires OpenAI API key)')
+    parser.add_argument('--ai-concurrency', type=int, default=4, help='Concurrent AI requests (default: 4)')
+    parser.add_argument('--ai-chunks', type=int, default=8, help='Max chunks summarized per file; larger files are sampled evenly (default: 8, 0 = every chunk)')
+    parser.add_argument('--plugin', action='append', help='Load plugin file(s)')
+    parser.add_argument('--cache', action='store_true', help='Reuse analysis results from ~/.cache/raptors (also RAPTORS_CACHE=1)')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the analysis cache')
+    parser.add_argument('--cache-stats', action='store_true', help='Print analysis cache statistics')
+    parser.add_argument('--profile', action='store_true', help='Print per-stage and per-plugin timings, bytes read and peak memory')
+    parser.add_argument('--metrics-json', metavar='PATH', help='Write the profile metrics to PATH (- for stdout)')
+    parser.add_argument('--metrics-format', choices=['json', 'prometheus'], default='json', help='Format for --metrics-json (default: json)')
+    parser.add_argument('--serve', nargs='?', const=default_socket(), metavar='SOCKET', help='Run a warm preview daemon on a Unix socket (default: $RAPTORS_SOCKET or a per-user runtime path)')
+    return parser
+
+def load_plugins(plugin_paths):
+    plugin_manager = PluginManager()
+    for plugin_path in plugin_paths or []:
+        if os.path.exists(plugin_path):
+            if plugin_manager.load_plugin(plugin_path): print(f"{Colors.GREEN}✅ Loaded plugin: {plugin_path}{Colors.RESET}")
+            else: print(f"{Colors.RED}❌ Failed to load plugin: {plugin_path}{Colors.RESET}")
+        else: print(f"{Colors.RED}❌ Plugin not found: {plugin_path}{Colors.RESET}")
+    return plugin_manager
+
+def run(args, parser, plugin_manager=None, cache=None, env=os.environ, start_method=None):
+    if not args.files and not args.cache_stats: parser.error('at least one file is required')
+    if args.lines <= 0 or args.width <= 0: print(f"{Colors.RED}❌ Lines and width must be positive{Colors.RESET}"); sys.exit(1)
+    if args.workers is not None and args.workers <= 0: print(f"{Colors.RED}❌ Workers must be positive{Colors.RESET}"); sys.exit(1)
+    plugin_manager = plugin_manager or load_plugins(args.plugin)
+    previewer = FilePreview(use_ai=args.ai, plugin_manager=plugin_manager)
+    previewer.start_method = start_method
+    previewer.max_lines,previewer.max_width = min(args.lines, 1000),min(args.width, 500)
+    previewer.ai_concurrency,previewer.ai_chunks = max(args.ai_concurrency, 1),max(args.ai_chunks, 0)
+    previewer.binary_offset,previewer.binary_length,previewer.show_entropy,previewer.strings_min,previewer.member = args.offset,args.length,args.entropy,max(args.strings, 0),args.member
+    previewer.csv_profile,previewer.csv_sample,previewer.json_structure,previewer.full_analysis = args.csv_profile,max(args.sample, 1),args.structure,args.full_analysis
+    previewer.tail,previewer.follow,previewer.since,previewer.until,previewer.build_index = args.tail if args.tail is None else max(args.tail, 0),args.follow,args.since,args.until,args.index
+    if (args.cache or args.cache_stats or env.get('RAPTORS_CACHE', '').lower() in ('1', 'true', 'yes')) and not args.no_cache:
+        import sqlite3
+        try: previewer.cache = cache() if cache else AnalysisCache()
+        except (OSError, sqlite3.Error) as e: print(f"{Colors.YELLOW}⚠️ Cache unavailable: {str(e)[:60]}{Colors.RESET}")
+    if args.profile or args.metrics_json: previewer.metrics = Metrics()
+    try:
+        if args.dedupe: previewer.dedupe_paths(args.files, args.recursive, args.workers)
+        elif len(args.files) > 1 or (args.files and os.path.isdir(args.files[0])): previewer.scan_paths(args.files, args.recursive, args.workers)
+        elif args.files: previewer.preview_file(args.files[0])
+    finally:
+        if previewer.cache:
+            previewer.cache.flush()
+            if args.cache_stats:
+                stats = previewer.cache.stats()
+                print(f"\n{Colors.CYAN}🗄️  Cache: {stats['entries']:,} entries | {previewer.format_size(stats['bytes'])} | {stats['hits']} hits | {stats['misses']} misses ({stats['stale']} stale) | {stats['path']}{Colors.RESET}")
+            if not cache: previewer.cache.close()
+        if args.profile: previewer.print_metrics()
+        if args.metrics_json: previewer.write_metrics(args.metrics_json, args.metrics_format)
 
 def main():
     try:
-        parser = argparse.ArgumentParser(description='🔍 Smart File Preview Tool with Plugin Support')
-        parser.add_argument('file', help='File to preview')
-        parser.add_argument('-n', '--lines', type=int, default=50, help='Max lines (default: 50)')
-        parser.add_argument('-w', '--width', type=int, default=120, help='Max width (default: 120)')
-        parser.add_argument('--ai', action='store_true', help='Enable AI analysis (requires OpenAI API key)')
-        parser.add_argument('--plugin', action='append', help='Load plugin file(s)')
+        parser = build_parser()
         args = parser.parse_args()
-        if args.lines <= 0 or args.width <= 0: print(f"{Colors.RED}❌ Lines and width must be positive{Colors.RESET}"); sys.exit(1)
-        plugin_manager = PluginManager()
-        if args.plugin:
-            for plugin_path in args.plugin:
-                if os.path.exists(plugin_path):
-                    if plugin_manager.load_plugin(plugin_path): print(f"{Colors.GREEN}✅ Loaded plugin: {plugin_path}{Colors.RESET}")
-                    else: print(f"{Colors.RED}❌ Failed to load plugin: {plugin_path}{Colors.RESET}")
-                else: print(f"{Colors.RED}❌ Plugin not found: {plugin_path}{Colors.RESET}")
-        previewer = FilePreview(use_ai=args.ai, plugin_manager=plugin_manager)
-        previewer.max_lines,previewer.max_width = min(args.lines, 1000),min(args.width, 500)
-        previewer.preview_file(args.file)
+        if args.serve: return PreviewServer(args.serve, parser, [os.path.abspath(path) for path in args.plugin or []]).serve()
+        run(args, parser)
     except KeyboardInterrupt: print(f"\n{Colors.YELLOW}⚠️  Cancelled by user{Colors.RESET}"); sys.exit(0)
     except Exception as e: print(f"{Colors.RED}❌ Application error: {str(e)[:60]}{Colors.RESET}"); sys.exit(1)
 
-if __name__ == '__main__': main()
\ No newline at end of file
+if __name__ == '__main__': main()
@@ -0,0 +1,16 @@
+import os,sys,re
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+import preview
+
+ANSI = re.compile(r'\x1b\[[0-9;]*m')
+
+@pytest.fixture
+def raptors(capsys, monkeypatch, tmp_path):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    def run(*argv):
+        parser = preview.build_parser()
+        preview.run(parser.parse_args([str(arg) for arg in argv]), parser, env={})
+        return ANSI.sub('', capsys.readouterr().out)
+    return run
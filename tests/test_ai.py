@@ -0,0 +1,85 @@
+from functools import wraps
+from types import SimpleNamespace
+
+import preview
+
+class RateLimited(Exception):
+    status_code,response = 429,SimpleNamespace(headers={'retry-after': '0'})
+
+def fake_client(failures=0):
+    prompts = []
+    def create(model, messages, max_tokens):
+        prompts.append(messages[0]['content'])
+        if len(prompts) <= failures: raise RateLimited('429 Too Many Requests')
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f'summary {len(prompts)}'))])
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))),prompts
+
+def async_client():
+    prompts = []
+    def required_args(fn):
+        # Like the openai SDK: a plain sync wrapper around an async def, so iscoroutinefunction() is False
+        @wraps(fn)
+        def wrapper(*args, **kwargs): return fn(*args, **kwargs)
+        return wrapper
+    @required_args
+    async def create(model, messages, max_tokens):
+        prompts.append(messages[0]['content'])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f'summary {len(prompts)}'))])
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))),prompts
+
+def pipeline(client, **options):
+    return preview.AIPipeline(lambda: client, chunk_tokens=25, **options)
+
+def test_chunks_cover_every_line_or_report_sampling():
+    text = ''.join(f'line {i:03d}\n' for i in range(100))
+    chunks,total = pipeline(None, max_chunks=0).chunks(text)
+    assert ''.join(chunks) == text and total == len(chunks) > 8
+    sampled,total = pipeline(None, max_chunks=4).chunks(text)
+    assert len(sampled) == 4 and total == len(chunks) and sampled[0] == chunks[0]
+
+def test_map_reduce_is_hierarchical():
+    client,prompts = fake_client()
+    ai = pipeline(client, max_chunks=0)
+    text = ''.join(f'line {i:03d}\n' for i in range(100))
+    report = ai.run(lambda: ai.analyze(text, 'log'))
+    chunks = len(ai.chunks(text)[0])
+    combines = [prompt for prompt in prompts if 'Combine these' in prompt]
+    assert report.startswith('summary') and len(prompts) == chunks + len(combines)
+    assert all(prompt.count('Part ') <= ai.fan_in for prompt in combines) and len(combines) > 1
+
+def test_sampled_report_says_so():
+    client,_ = fake_client()
+    ai = pipeline(client, max_chunks=2)
+    assert 'Sampled 2 of' in ai.run(lambda: ai.analyze(''.join(f'line {i:03d}\n' for i in range(100)), 'log'))
+
+def test_async_client_behind_sync_decorator():
+    client,prompts = async_client()
+    ai = pipeline(client, max_chunks=0)
+    text = ''.join(f'line {i:03d}\n' for i in range(100))
+    assert ai.run(lambda: ai.analyze(text, 'log')).startswith('summary')
+    assert ai.blocking is False and len(prompts) == ai.calls > len(ai.chunks(text)[0])
+
+def test_retries_rate_limits():
+    client,prompts = fake_client(failures=2)
+    ai = pipeline(client)
+    assert ai.run(lambda: ai.analyze('short file', 'text')) == 'summary 3'
+    assert ai.calls == 3 and len(prompts) == 3 and ai.blocking
+
+def test_identical_content_is_sent_once():
+    client,prompts = fake_client()
+    ai = pipeline(client)
+    reports = ai.run(lambda: ai.analyze_many([('same text', 'text', 'utf-8')] * 3))
+    assert reports == ['summary 1'] * 3 and len(prompts) == 1 and ai.cached_hits == 2
+    assert ai.run(lambda: ai.analyze('same text', 'text')) == 'summary 1'
+    assert len(prompts) == 1 and ai.cached_hits == 3
+
+def test_persistent_cache_skips_the_client(tmp_path):
+    cache = preview.AnalysisCache(tmp_path / 'analysis.db')
+    try:
+        client,prompts = fake_client()
+        ai = pipeline(client, cache=cache)
+        ai.run(lambda: ai.analyze('cached text', 'text'))
+        fresh = pipeline(fake_client()[0], cache=cache)
+        assert fresh.run(lambda: fresh.analyze('cached text', 'text')) == 'summary 1'
+        assert fresh.calls == 0 and fresh.cached_hits == 1 and len(prompts) == 1
+    finally: cache.close()
@@ -0,0 +1,35 @@
+import preview
+
+SOURCE = '''import os
+from sys import path
+
+# contact admin@example.com or ops.team+alerts@mail.example.org
+class Server:
+    def run(self):
+        token = os.environ.get("API_TOKEN")
+        return "http://10.0.0.1:8080/health"
+
+def main(): pass
+'''
+
+def test_analysis_counts(tmp_path):
+    path = tmp_path / 'server.py'
+    path.write_text(SOURCE + 'peers 192.168.1.20, v1.2.3.4 and 1.2.3 see https://docs.example.com/x\n')
+    _, code_stats, patterns, security, urls = preview.FilePreview().analyze_file_comprehensive(str(path), None, 'python')
+    assert code_stats == {'functions': 2, 'classes': 1, 'comments': 1, 'imports': 2}
+    assert patterns == {'urls': 2, 'emails': 2, 'ips': 2}
+    assert urls == ['http://10.0.0.1:8080/health', 'https://docs.example.com/x']
+    assert security['sensitive_content'] == 1
+
+def test_stream_renders_before_sampled_analysis(capsys, tmp_path):
+    path = tmp_path / 'big.log'
+    path.write_text(''.join(f'2024-01-01 10:00:00 INFO request {i} from 10.0.0.{i % 200}\n' for i in range(2000)))
+    previewer = preview.FilePreview()
+    previewer.stream_threshold,previewer.analysis_sample = 1024,4096
+    previewer.preview_file(str(path))
+    out = capsys.readouterr().out
+    assert out.index('request 0') < out.index('Comprehensive Analysis')
+    assert '--full-analysis' in out and '2,001 lines' not in out
+    previewer.full_analysis = True
+    previewer.preview_file(str(path))
+    assert '2,001 lines' in capsys.readouterr().out
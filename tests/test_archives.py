@@ -0,0 +1,47 @@
+import io,gzip,tarfile
+
+import pytest
+
+MEMBERS = {
+    'data/people.csv': b'name,age,city\nada,36,london\ngrace,45,new york\n',
+    'data/config.json': b'{"service": "api", "ports": [80, 443]}\n',
+    'data/events.ndjson': b'{"event": "login", "user": 1}\n{"event": "logout", "user": 1}\n',
+    'logs/app.log': b'2024-01-01 10:00:00 INFO started\n2024-01-01 10:00:01 ERROR failed\n',
+}
+
+@pytest.fixture
+def tarball(tmp_path):
+    path = tmp_path / 'bundle.tar.gz'
+    with tarfile.open(path, 'w:gz') as archive:
+        for name, data in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return path
+
+@pytest.mark.parametrize('member,expected', [
+    ('data/people.csv', ['Columns (3): name, age, city', 'grace']),
+    ('data/config.json', ['"service": "api"', '443']),
+    ('data/events.ndjson', ['"event": "logout"', 'Record schema']),
+    ('logs/app.log', ['ERROR failed']),
+])
+def test_compressed_tar_member(raptors, tarball, member, expected):
+    out = raptors(tarball, '--member', member)
+    assert 'seekable' not in out and 'Decompression failed' not in out
+    for text in expected: assert text in out
+
+def test_compressed_tar_listing(raptors, tarball):
+    out = raptors(tarball)
+    for name in MEMBERS: assert name in out
+
+def test_gzip_hex_dump_stops_at_data(raptors, tmp_path):
+    path = tmp_path / 'blob.bin.gz'
+    path.write_bytes(gzip.compress(b'\x00\x01\x02\x03' * 5))
+    rows = [line for line in raptors(path).splitlines() if line[:8].isalnum() and '|' in line]
+    assert len(rows) == 2
+
+def test_gzip_tail(raptors, tmp_path):
+    path = tmp_path / 'app.log.gz'
+    path.write_bytes(gzip.compress(''.join(f'2024-01-01 10:00:{i:02d} INFO line {i}\n' for i in range(50)).encode()))
+    out = raptors(path, '--tail', 3)
+    assert 'Last 3 lines' in out and 'line 49' in out and 'line 46' not in out
@@ -0,0 +1,15 @@
+import re
+
+HEX_ROW = re.compile(r'^[0-9a-f]{8}  (?:[0-9a-f]{2} )+', re.M)
+
+def test_length_bounds_the_scan_not_the_dump(raptors, tmp_path):
+    path = tmp_path / 'firmware.bin'
+    path.write_bytes(bytes(4096) + b'firmware-string-' * 4096 + bytes(4096))
+    out = raptors('--offset', 4096, '--length', 65536, '--strings', 8, '-n', 5, path)
+    assert len(HEX_ROW.findall(out)) == 5 and 'more bytes in range' in out and 'firmware-string-' in out
+
+def test_length_alone_sets_a_small_dump(raptors, tmp_path):
+    path = tmp_path / 'firmware.bin'
+    path.write_bytes(bytes(range(256)) * 64)
+    assert len(HEX_ROW.findall(raptors('--offset', 0x400, '--length', 64, path))) == 4
+    assert len(HEX_ROW.findall(raptors(path))) == 16
@@ -0,0 +1,68 @@
+import os,time
+
+import preview
+
+def cached(tmp_path, **limits):
+    return preview.AnalysisCache(tmp_path / 'analysis.db', **limits)
+
+def test_rerun_is_served_from_the_cache(raptors, tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text('hello\nworld\n')
+    assert '0 hits | 1 misses' in raptors('--cache', '--cache-stats', path)
+    assert '1 hits | 0 misses' in raptors('--cache', '--cache-stats', path)
+
+def test_changed_files_are_stale(tmp_path):
+    path = tmp_path / 'data.txt'
+    def lookup(change):
+        path.write_bytes(b'a' * 10000)
+        os.utime(path, ns=(10 ** 18, 10 ** 18))
+        cache = cached(tmp_path)
+        cache.update(path, analysis={'lines': 1})
+        cache.close()
+        change()
+        cache = cached(tmp_path)
+        try: return cache.get(path),cache.stale
+        finally: cache.close()
+    assert lookup(lambda: None) == ({'analysis': {'lines': 1}}, 0)
+    assert lookup(lambda: (path.write_bytes(b'a' * 10001), os.utime(path, ns=(10 ** 18, 10 ** 18)))) == ({}, 1)
+    assert lookup(lambda: os.utime(path, ns=(10 ** 18, 10 ** 18 + 1))) == ({}, 1)
+    # Same size and mtime with a different head: only the content fingerprint notices
+    assert lookup(lambda: (path.write_bytes(b'b' + b'a' * 9999), os.utime(path, ns=(10 ** 18, 10 ** 18)))) == ({}, 1)
+
+def test_eviction_is_lru_and_honours_both_limits(tmp_path):
+    files = []
+    for i in range(6):
+        files.append(tmp_path / f'f{i}.txt'); files[-1].write_text(str(i))
+    cache = cached(tmp_path, max_entries=4)
+    try:
+        for path in files[:4]: cache.update(path, n=1); cache.flush(); time.sleep(0.01)
+        cache.get(files[0]); cache.flush(); time.sleep(0.01)
+        for path in files[4:]: cache.update(path, n=1); cache.flush(); time.sleep(0.01)
+        survivors = {row[0] for row in cache.db.execute('SELECT path FROM entries')}
+        assert survivors == {str(files[i]) for i in (0, 3, 4, 5)} and cache.stats()['entries'] == 4
+        cache.max_bytes = cache.stats()['bytes'] - 1
+        cache.flush()
+        survivors = {row[0] for row in cache.db.execute('SELECT path FROM entries')}
+        assert survivors == {str(files[i]) for i in (0, 4, 5)}
+        assert cache.stats()['bytes'] == cache.db.execute('SELECT SUM(LENGTH(data)) FROM entries').fetchone()[0] <= cache.max_bytes
+    finally: cache.close()
+
+def test_replacing_an_entry_keeps_the_totals(tmp_path):
+    path = tmp_path / 'grow.txt'
+    path.write_text('x')
+    cache = cached(tmp_path)
+    try:
+        for size in (1, 50, 5):
+            cache.update(path, blob='y' * size); cache.flush()
+        assert cache.stats()['entries'] == 1
+        assert cache.stats()['bytes'] == cache.db.execute('SELECT SUM(LENGTH(data)) FROM entries').fetchone()[0]
+    finally: cache.close()
+
+def test_no_cache_beats_the_environment(capsys, monkeypatch, tmp_path):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    path,parser,database = tmp_path / 'notes.txt',preview.build_parser(),tmp_path / 'cache' / 'raptors' / 'analysis.db'
+    path.write_text('hello\n')
+    preview.run(parser.parse_args(['--no-cache', str(path)]), parser, env={'RAPTORS_CACHE': '1'})
+    assert not database.exists()
+    preview.run(parser.parse_args([str(path)]), parser, env={'RAPTORS_CACHE': '1'})
+    assert database.exists()
@@ -0,0 +1,71 @@
+import os,socket,threading
+
+import pytest
+
+import client
+import preview
+
+def test_default_socket_is_private(monkeypatch, tmp_path):
+    monkeypatch.delenv('RAPTORS_SOCKET', raising=False)
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    monkeypatch.setenv('TMPDIR', str(tmp_path))
+    monkeypatch.setattr('tempfile.tempdir', None)
+    path = preview.default_socket()
+    assert path == client.default_socket() == str(tmp_path / f'raptors-{os.getuid()}' / 'raptors.sock')
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    assert preview.default_socket() == client.default_socket() == str(tmp_path / 'raptors.sock')
+
+def test_serve_binds_owner_only(tmp_path, monkeypatch):
+    path = str(tmp_path / 'run' / 'raptors.sock')
+    server = preview.PreviewServer(path, preview.build_parser())
+    monkeypatch.setattr(preview, 'OutputRouter', lambda stream: stream)
+    monkeypatch.setattr(socket.socket, 'accept', lambda self: (_ for _ in ()).throw(KeyboardInterrupt()))
+    seen = {}
+    listen = socket.socket.listen
+    def record(self, backlog):
+        seen['socket'],seen['dir'] = os.stat(path).st_mode & 0o777,os.stat(os.path.dirname(path)).st_mode & 0o777
+        return listen(self, backlog)
+    monkeypatch.setattr(socket.socket, 'listen', record)
+    with pytest.raises(KeyboardInterrupt): server.serve()
+    assert seen['dir'] == 0o700 and not seen['socket'] & 0o077
+
+def test_client_refuses_foreign_socket(tmp_path, monkeypatch):
+    path = str(tmp_path / 'raptors.sock')
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    try:
+        client.connect(path).close()
+        monkeypatch.setattr(os, 'getuid', lambda: os.stat(path).st_uid + 1)
+        with pytest.raises(PermissionError): client.connect(path)
+    finally: listener.close()
+
+def ask(server, monkeypatch, argv, cwd):
+    monkeypatch.setattr(preview.sys, 'stdout', preview.OutputRouter(preview.sys.stdout))
+    monkeypatch.setattr(preview.sys, 'stderr', preview.OutputRouter(preview.sys.stderr))
+    ours,theirs = socket.socketpair()
+    with ours:
+        ours.sendall((preview.json.dumps({'argv': argv, 'cwd': str(cwd)}) + '\n').encode())
+        worker = threading.Thread(target=server.handle, args=(theirs,))
+        worker.start()
+        reply = b''.join(iter(lambda: ours.recv(1 << 16), b''))
+        worker.join(5)
+    assert not worker.is_alive()
+    body,_,code = reply.decode().rpartition('\0')
+    return body,int(code)
+
+def test_daemon_refuses_follow(tmp_path, monkeypatch):
+    (tmp_path / 'app.log').write_text('2025-01-01 00:00:00 INFO up\n')
+    body,code = ask(preview.PreviewServer(str(tmp_path / 's.sock'), preview.build_parser()), monkeypatch, ['--follow', 'app.log'], tmp_path)
+    assert code == 2 and '--follow is not served' in body
+
+def test_daemon_batch_workers_are_spawned(tmp_path, monkeypatch):
+    for i in range(3): (tmp_path / f'f{i}.txt').write_text(f'file {i}\n')
+    import concurrent.futures
+    contexts,pool = [],concurrent.futures.ProcessPoolExecutor
+    def recording(*args, **kwargs):
+        contexts.append(kwargs.get('mp_context'))
+        return pool(*args, **kwargs)
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', recording)
+    body,code = ask(preview.PreviewServer(str(tmp_path / 's.sock'), preview.build_parser()), monkeypatch, ['-j', '2', '.'], tmp_path)
+    assert code == 0 and 'f2.txt' in body and [context.get_start_method() for context in contexts] == ['spawn']
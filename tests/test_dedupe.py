@@ -0,0 +1,50 @@
+import hashlib,os,re
+
+import preview
+
+PREFIX = 1 << 16
+
+def test_digests_match_hashlib(tmp_path):
+    data = os.urandom(3 * 4096 + 17)
+    path = tmp_path / 'blob.bin'
+    path.write_bytes(data)
+    for chunk in (4096, 1 << 22):
+        digests = preview.hash_digests(str(path), chunk=chunk)
+        assert digests == {name: hashlib.new(name, data).hexdigest() for name in ('md5', 'sha1', 'sha256')}
+        assert all(len(digest) == hashlib.new(name).digest_size * 2 for name, digest in digests.items())
+    assert preview.hash_digests(data, ('sha256',), limit=100) == {'sha256': hashlib.sha256(data[:100]).hexdigest()}
+    assert preview.hash_digests(b'') == {name: hashlib.new(name).hexdigest() for name in ('md5', 'sha1', 'sha256')}
+
+def dedupe(capsys, tmp_path, files):
+    for name, data in files.items(): (tmp_path / name).write_bytes(data)
+    previewer,reads = preview.FilePreview(),[]
+    digest = previewer.file_digest
+    def recording(filepath, limit=None):
+        reads.append((os.path.basename(filepath), limit))
+        return digest(filepath, limit)
+    previewer.file_digest = recording
+    previewer.dedupe_paths([str(tmp_path)])
+    out = re.sub(r'\x1b\[[0-9;]*m', '', capsys.readouterr().out)
+    groups = [{os.path.basename(line.strip()) for line in block.splitlines()} for block in re.findall(r'copies × [^\n]*\n((?:  [^\n]*\n)+)', out)]
+    return groups,reads,out
+
+def test_same_size_different_prefix_stops_at_the_prefix(capsys, tmp_path):
+    groups,reads,out = dedupe(capsys, tmp_path, {'a.bin': b'a' * (2 * PREFIX), 'b.bin': b'b' * (2 * PREFIX)})
+    assert groups == [] and all(limit == PREFIX for _, limit in reads) and 'Fully read: 0 of 2' in out
+
+def test_same_prefix_different_tail_needs_a_full_read(capsys, tmp_path):
+    head = b'x' * PREFIX
+    groups,reads,out = dedupe(capsys, tmp_path, {'a.bin': head + b'tail-a', 'b.bin': head + b'tail-b', 'c.bin': head + b'tail-a'})
+    assert groups == [{'a.bin', 'c.bin'}] and sorted(name for name, limit in reads if limit is None) == ['a.bin', 'b.bin', 'c.bin']
+    assert 'Fully read: 3 of 3' in out and f"sha256:{hashlib.sha256(head + b'tail-a').hexdigest()}\n" in out
+
+def test_files_within_the_prefix_are_never_reread(capsys, tmp_path):
+    groups,reads,out = dedupe(capsys, tmp_path, {'a.txt': b'y' * PREFIX, 'b.txt': b'y' * PREFIX, 'c.txt': b'small', 'd.txt': b'small', 'e.txt': b'other'})
+    assert sorted(map(sorted, groups)) == [['a.txt', 'b.txt'], ['c.txt', 'd.txt']]
+    assert all(limit == PREFIX for _, limit in reads) and 'Fully read: 0 of 5' in out
+
+def test_hard_links_and_empty_files_are_skipped(capsys, tmp_path):
+    (tmp_path / 'a.bin').write_bytes(b'same')
+    os.link(tmp_path / 'a.bin', tmp_path / 'link.bin')
+    groups,reads,out = dedupe(capsys, tmp_path, {'empty1': b'', 'empty2': b''})
+    assert groups == [] and reads == [] and 'Groups: 0' in out
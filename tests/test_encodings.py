@@ -0,0 +1,35 @@
+import codecs
+
+import pytest
+
+import preview
+
+@pytest.mark.parametrize('header,expected', [
+    (b'\x00\x01\x02', None),
+    (b'h\x00i\x00', None),
+    ('hello world, plain text\n'.encode('utf-16-le'), 'utf-16-le'),
+    ('hello world, plain text\n'.encode('utf-16-be'), 'utf-16-be'),
+    (bytes(range(32)) * 2, None),
+    (codecs.BOM_UTF16_LE + 'hi'.encode('utf-16-le'), 'utf-16'),
+    (b'plain ascii', 'utf-8'),
+])
+def test_sniff_encoding(header, expected):
+    assert preview.sniff_encoding(header) == expected
+
+@pytest.mark.parametrize('encoding', ['utf-16', 'utf-16-be', 'utf-32', 'utf-8'])
+def test_line_reader_splits_decoded_lines(tmp_path, encoding):
+    text = ''.join(f'line {i} Ċ਀\n' for i in range(5))
+    path = tmp_path / 'wide.txt'
+    path.write_bytes(text.encode(encoding))
+    with open(path, 'rb') as f:
+        reader = preview.LineReader(f, encoding)
+        lines = iter(reader)
+        assert [next(lines), next(lines)] == ['line 0 Ċ਀', 'line 1 Ċ਀']
+        assert reader.remaining() == 3
+
+@pytest.mark.parametrize('encoding', ['utf-16', 'utf-16-be', 'utf-32', 'utf-8-sig'])
+def test_tail_wide_log(raptors, tmp_path, encoding):
+    path = tmp_path / 'app.log'
+    path.write_bytes(''.join(f'2024-01-01 10:00:{i:02d} INFO event {i} ਊ\n' for i in range(40)).encode(encoding))
+    out = raptors(path, '--tail', 2)
+    assert 'Last 2 lines' in out and 'event 39 ਊ' in out and 'event 38' in out and 'event 37' not in out
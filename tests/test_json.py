@@ -0,0 +1,47 @@
+import io,gzip
+
+import pytest
+
+import preview
+
+DOCUMENTS = ['{"a": 1}', '[1, 2, {"x": null, "y": [true, false]}]', '"s,{["', '[[],{},{"a":[ ]}]', '{"k": "a\\\\\\",b", "z": [1,[2,3],{}]}', '3']
+
+@pytest.mark.parametrize('text', DOCUMENTS)
+def test_line_count_matches_pretty_print(text):
+    assert preview.pretty_json_line_count(text) == sum(1 for _ in preview.pretty_json_lines(preview.json_tokens(io.StringIO(text))))
+
+@pytest.mark.parametrize('text,error', [
+    ('{"a": 1, "b": [1,2,}', "unbalanced '}'"),
+    ('{"a" 1}', "unexpected '1'"),
+    ('{"a": tru}', "unexpected 'tru'"),
+    ('{"a": [1, 2]', "unclosed '{'"),
+    ('[1] 2', "trailing data '2'"),
+    ('{"a": "open', 'unterminated string'),
+])
+def test_checked_tokens_report_the_first_error(text, error):
+    problems = []
+    list(preview.checked_json_tokens(preview.json_tokens(io.StringIO(text)), problems))
+    assert len(problems) == 1 and problems[0].startswith(error)
+
+@pytest.mark.parametrize('text', DOCUMENTS)
+def test_checked_tokens_accept_valid_json(text):
+    problems = []
+    list(preview.checked_json_tokens(preview.json_tokens(io.StringIO(text)), problems))
+    assert problems == []
+
+def test_malformed_file_falls_back_to_text(raptors, tmp_path):
+    path = tmp_path / 'broken.json'
+    path.write_text('{"a": 1, "b": [1,2,}')
+    out = raptors(path)
+    assert 'Malformed JSON' in out and '{"a": 1, "b": [1,2,}' in out
+
+def test_in_memory_json_counts_remaining_lines(raptors, tmp_path):
+    path = tmp_path / 'list.json'
+    path.write_text('[' + ', '.join(map(str, range(30))) + ']')
+    out = raptors(path, '-n', 5)
+    assert '... 27 more lines' in out and 'not counted' not in out
+
+def test_streamed_malformed_json_warns(raptors, tmp_path):
+    path = tmp_path / 'broken.json.gz'
+    path.write_bytes(gzip.compress(b'{"a": 1, "b": [1,2,}'))
+    assert "Malformed JSON: unbalanced '}'" in raptors(path)
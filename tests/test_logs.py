@@ -0,0 +1,19 @@
+import os
+
+def write_log(path, count=50):
+    path.write_text(''.join(f'2024-01-01 10:{i // 60:02d}:{i % 60:02d} {"ERROR" if i % 10 == 0 else "INFO"} event {i}\n' for i in range(count)))
+    return path
+
+def test_since_keeps_the_index_in_the_cache(raptors, tmp_path):
+    (tmp_path / 'logs').mkdir()
+    log = write_log(tmp_path / 'logs' / 'app.log')
+    out = raptors(log, '--since', '2024-01-01 10:00:45')
+    assert 'event 45' in out and 'event 44' not in out
+    assert os.listdir(log.parent) == ['app.log']
+    assert len(os.listdir(tmp_path / 'cache' / 'raptors' / 'index')) == 1
+
+def test_index_writes_the_sidecar(raptors, tmp_path):
+    log = write_log(tmp_path / 'app.log')
+    out = raptors(log, '--index')
+    assert '50 lines' in out and '5 errors' in out
+    assert (tmp_path / 'app.log.rpidx').exists()
@@ -0,0 +1,26 @@
+import os
+
+import preview
+
+PLUGINS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'plugins')
+
+def test_network_handler_without_context(capsys, tmp_path):
+    path = tmp_path / 'app.conf'
+    path.write_text('upstream api { server 10.0.0.5:8080; }\n')
+    manager = preview.PluginManager()
+    assert manager.load_plugin(os.path.join(PLUGINS, 'network_plugin.py'))
+    previewer = preview.FilePreview(plugin_manager=manager)
+    assert previewer.context is None
+    manager.get_handler('config')(str(path), previewer)
+    out = capsys.readouterr().out
+    assert 'Network analysis error' not in out and '10.0.0.5' in out and ':8080' in out
+
+def test_processors_opt_into_the_context(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text('hello\n')
+    manager,seen = preview.PluginManager(),[]
+    manager.register_processor(lambda context: seen.append(('context', context.text)), name='new', context=True)
+    manager.register_processor(lambda ctx, content, file_type: seen.append(('legacy', ctx, content, file_type)), name='old')
+    manager.workers = 1
+    manager.process_file(str(path), 'hello\n', 'text')
+    assert seen == [('context', 'hello\n'), ('legacy', str(path), 'hello\n', 'text')]